@@ -1,5 +1,7 @@
 import sys
 import os
+import time
+import threading
 
 # Ensure imports work on Streamlit Cloud
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -11,18 +13,32 @@ from utils.timeline_visualizer import (
     plot_experiment_timeline,
     generate_timeline_insights
 )
-from pipeline.orchestrator import run_pipeline, compare_runs
+from pipeline.orchestrator import compare_runs, prefetch_index
+from pipeline.indexing.prefetch import cancel_stale_prefetches
+from pipeline.generation.backends import warm_up as warm_up_generation
+from utils.result_store import cached_run_pipeline
+from utils.profiler import top_functions
+from utils.latency_report import latency_report
+from utils.job_queue import get_job_manager, list_jobs
+from utils.upload_store import store_upload, display_name
 from utils.config_schema import PipelineConfig
+from pipeline.filtering.gap_dedup import GAP_DEDUP_THRESHOLD
+from pipeline.embedding.local_embedding import (
+    EMBEDDING_MODELS,
+    EXTRAS_INSTALL_HINT,
+    available_embedding_models
+)
 from utils.experiment_logger import (
     log_single_run,
     log_comparison_run,
+    log_cache_hit,
     load_experiment_history
 )
 from utils.experiment_sweeper import (
     generate_config_grid,
     run_single_sweep
 )
-from utils.best_config_selector import select_best_config
+from utils.best_config_selector import select_best_config, select_pareto_configs
 from utils.radar_visualizer import plot_comparison_radar
 
 
@@ -82,6 +98,30 @@ with col1:
 
 with col2:
     compare_mode = st.checkbox("Enable Configuration Comparison")
+    force_rerun = st.checkbox(
+        "Force re-run",
+        help="Ignore stored results for this document, config and question"
+    )
+    profile_run = st.checkbox(
+        "Profile run",
+        help="Run under cProfile and keep the profile next to the log entry"
+    )
+    track_memory = st.checkbox(
+        "Track memory",
+        help="Record peak memory per pipeline stage (slows the run down)"
+    )
+
+
+# Load the generation model in the background once per server process,
+# so the first Run does not pay for it
+@st.cache_resource
+def start_generation_warm_up():
+    thread = threading.Thread(target=warm_up_generation, daemon=True)
+    thread.start()
+    return thread
+
+
+start_generation_warm_up()
 
 
 # --------------------------------------------------
@@ -98,6 +138,12 @@ chunking_mode = st.sidebar.radio(
     ["Fixed", "Adaptive"]
 )
 
+st.sidebar.markdown("### Service Level")
+st.sidebar.caption("Tail-latency objective for flagging slow runs and configs")
+
+slo_percentile = st.sidebar.selectbox("SLO Percentile", ["p50", "p95", "p99"], index=1)
+slo_seconds = st.sidebar.number_input("SLO Latency (s)", 1.0, 600.0, 30.0, step=5.0)
+
 
 def resolve_chunking_mode():
     return "adaptive" if chunking_mode == "Adaptive" else "fixed"
@@ -142,15 +188,42 @@ def build_config(prefix="A"):
         ["conservative", "creative", "structured"]
     )
 
+    embedding_models = available_embedding_models()
+
+    embedding_model = st.sidebar.selectbox(
+        f"Embedding Backend {prefix}",
+        list(embedding_models),
+        help="local = PyTorch; ONNX backends need optimum[onnxruntime]"
+    )
+
+    missing_models = [m for m in EMBEDDING_MODELS if m not in embedding_models]
+    if missing_models:
+        st.sidebar.caption(f"Not installed: {', '.join(missing_models)} ({EXTRAS_INSTALL_HINT})")
+
+    context_token_budget = None
+    if st.sidebar.checkbox(f"Token-Budgeted Context {prefix}"):
+        context_token_budget = st.sidebar.slider(
+            f"Context Token Budget {prefix}", 100, 2000, 600, step=50
+        )
+
+    gap_dedup_threshold = None
+    if st.sidebar.checkbox(f"Deduplicate Gap Sentences {prefix}"):
+        gap_dedup_threshold = st.sidebar.slider(
+            f"Gap Similarity Threshold {prefix}", 0.7, 1.0, GAP_DEDUP_THRESHOLD, step=0.01
+        )
+
     return PipelineConfig(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        embedding_model="local",
+        embedding_model=embedding_model,
         retrieval_mode=retrieval_mode,
         top_k=top_k,
         temperature=temperature,
         prompt_mode=prompt_mode,
-        chunking_mode=resolve_chunking_mode()
+        chunking_mode=resolve_chunking_mode(),
+        context_token_budget=context_token_budget,
+        gap_dedup_threshold=gap_dedup_threshold,
+        track_memory=track_memory
     )
 
 
@@ -163,11 +236,70 @@ config_B = build_config("B") if compare_mode else None
 # --------------------------------------------------
 
 def save_file(file):
-    path = os.path.join("data", "uploads", file.name)
-    os.makedirs("data/uploads", exist_ok=True)
-    with open(path, "wb") as f:
-        f.write(file.getbuffer())
-    return path
+    return store_upload(file.getvalue(), file.name)
+
+
+# Index the upload with the current sidebar settings while the user is
+# still adjusting controls; Run attaches to the in-flight build.
+if uploaded_file is not None:
+
+    upload = save_file(uploaded_file)
+
+    prefetches = [prefetch_index(config_A, upload)]
+    if config_B is not None:
+        prefetches.append(prefetch_index(config_B, upload))
+
+    # Builds queued for settings changed since are no longer wanted
+    cancel_stale_prefetches(prefetches)
+
+    if not all(f.done() for f in prefetches):
+        st.caption("Indexing document in the background…")
+    elif any(f.exception() for f in prefetches):
+        st.caption("Background indexing failed; Run will index the document again")
+    else:
+        st.caption("Document indexed for the current settings")
+
+
+# --------------------------------------------------
+# BATCH STUDY GRID
+# --------------------------------------------------
+
+if experiment_mode == "Batch Study":
+
+    st.markdown("### Batch Study Grid")
+    st.caption("Every combination runs in the background, varying Configuration A")
+
+    g1, g2, g3, g4 = st.columns(4)
+
+    grid_chunk_sizes = g1.multiselect("Chunk Sizes", [400, 600, 800], default=[400, 600, 800])
+    grid_modes = g2.multiselect(
+        "Retrieval Strategies", ["dense", "bm25", "hybrid"], default=[config_A.retrieval_mode]
+    )
+    grid_top_k = g3.multiselect("Top-K Values", [3, 5, 8, 10], default=[config_A.top_k])
+    grid_dedup = g4.multiselect(
+        "Gap Dedup Thresholds",
+        sorted({None, 0.85, GAP_DEDUP_THRESHOLD, 0.95, config_A.gap_dedup_threshold}, key=lambda t: t or 0),
+        default=[config_A.gap_dedup_threshold],
+        format_func=lambda t: "off" if t is None else str(t)
+    )
+
+    grid_retrieval_only = st.checkbox(
+        "Retrieval only, generate for Pareto-best configs",
+        help="Skips the LLM for dominated configs"
+    )
+
+    param_grid = {
+        "retrieval_mode": grid_modes,
+        "top_k": grid_top_k,
+        "gap_dedup_threshold": grid_dedup
+    }
+    if config_A.chunking_mode == "fixed":
+        param_grid["chunk_size"] = grid_chunk_sizes
+
+    st.caption(
+        f"{len(generate_config_grid(config_A, param_grid))} configurations"
+        + (" (each compared against Configuration B)" if compare_mode else "")
+    )
 
 
 # --------------------------------------------------
@@ -188,14 +320,64 @@ if run_button:
 
         if experiment_mode == "Single Run":
 
-            result = run_pipeline(config_A, path, query)
+            progress = st.empty()
+
+            def show_progress(done, total):
+                progress.progress(done / total, text=f"Indexed page {done}/{total}")
+
+            result = cached_run_pipeline(
+                config_A, path, query, force=force_rerun, profile=profile_run,
+                progress_callback=show_progress
+            )
+            progress.empty()
+
+            if result["cache"]["hit"]:
+                st.info(
+                    f"Served from result store (first run {result['cache']['stored_at']}). "
+                    "Tick 'Force re-run' to execute again."
+                )
 
             st.markdown("## Observability Metrics")
 
-            c1, c2, c3 = st.columns(3)
+            c1, c2, c3, c4 = st.columns(4)
             c1.metric("Chunks", result["debug"]["total_chunks_created"])
             c2.metric("Signals", result["debug"]["filtered_sentence_count"])
             c3.metric("Latency (s)", round(result["metrics"]["total_latency"], 2))
+            c4.metric(
+                "Context Tokens",
+                result["debug"].get("context_tokens_after", 0),
+                delta=result["debug"].get("context_tokens_after", 0)
+                - result["debug"].get("context_tokens_before", 0),
+                delta_color="inverse"
+            )
+
+            gap_dedup = result["debug"].get("gap_dedup")
+            if gap_dedup and gap_dedup["raw_gap_count"]:
+                st.caption(
+                    f"Gap sentences: {gap_dedup['raw_gap_count']} raw → "
+                    f"{gap_dedup['gap_cluster_count']} distinct "
+                    f"({100 * gap_dedup['redundancy_ratio']:.0f}% redundant)"
+                )
+
+            if "memory" in result["metrics"]:
+                st.markdown("#### Memory by Stage")
+                st.dataframe(
+                    [
+                        {"stage": stage, **usage}
+                        for stage, usage in result["metrics"]["memory"].items()
+                    ],
+                    use_container_width=True
+                )
+
+            generation = result["debug"].get("generation")
+            if generation and generation["backend"] != "fallback":
+                note = (
+                    f"Generated by {generation['backend']} ({generation['model']}) · "
+                    f"connection {1000 * generation['connect_time']:.1f} ms"
+                )
+                if generation["cold_start"] is not None:
+                    note += f" · model warm-up took {generation['cold_start']:.1f} s"
+                st.caption(note)
 
             st.caption("Metrics reflect how configuration influences system behavior")
 
@@ -204,7 +386,7 @@ if run_button:
             if experiment_note:
                 st.info(f"Intent: {experiment_note}")
 
-            for insight in interpret_metrics(result):
+            for insight in interpret_metrics(result, latency_threshold=slo_seconds):
                 st.write(f"- {insight}")
 
             failures = detect_failure_modes(config_A, result)
@@ -214,15 +396,75 @@ if run_button:
             with st.expander("Generated Output"):
                 st.write(result["output"])
 
-            log_single_run(config_A, result)
+            if result["cache"]["hit"]:
+                log_cache_hit(config_A, result)
+            else:
+                log_single_run(config_A, result)
 
         else:
-            st.warning("Batch mode execution configured. (Ensure sweep logic is implemented)")
+            grid = generate_config_grid(config_A, param_grid)
+
+            if not grid:
+                st.error("Select at least one value per grid parameter.")
+                st.stop()
+
+            if compare_mode:
+                job_id = get_job_manager().submit(
+                    "comparison", path, query,
+                    [(config, config_B) for config in grid],
+                    force=force_rerun
+                )
+            else:
+                job_id = get_job_manager().submit(
+                    "single", path, query, grid,
+                    force=force_rerun,
+                    retrieval_only=grid_retrieval_only,
+                    generate_pareto=grid_retrieval_only
+                )
+
+            st.success(f"Queued batch study {job_id} ({len(grid)} configurations)")
 
     except Exception as e:
         st.error(f"Execution failed: {str(e)}")
 
 
+# --------------------------------------------------
+# BACKGROUND JOBS
+# --------------------------------------------------
+
+jobs = list_jobs(limit=10)
+
+if jobs:
+
+    # Starting the manager resumes jobs interrupted by a restart
+    get_job_manager()
+
+    st.markdown("---")
+    st.header("Batch Studies")
+
+    jc1, jc2 = st.columns([1, 3])
+    jc1.button("Refresh")
+    auto_refresh = jc2.checkbox("Auto-refresh while running", value=True)
+
+    for job in jobs:
+
+        done, total = job["progress"]["done"], job["progress"]["total"]
+
+        st.markdown(
+            f"**{job['id']}** · {job['kind']} · {job['status']} · "
+            f"{display_name(job['document'])} · {job['created'][:19]}"
+        )
+        st.progress(done / total if total else 1.0, text=f"{done}/{total} configurations")
+
+        if job["status"] in ("queued", "running") and not job["cancel_requested"]:
+            if st.button("Cancel", key=f"cancel-{job['id']}"):
+                get_job_manager().cancel(job["id"])
+                st.rerun()
+
+        if job["error"]:
+            st.error(job["error"])
+
+
 # --------------------------------------------------
 # COMPARISON RADAR
 # --------------------------------------------------
@@ -231,7 +473,10 @@ history = load_experiment_history()
 
 if history:
 
-    valid_runs = [r for r in history if r["mode"] == "single"]
+    valid_runs = [
+        r for r in history
+        if r["mode"] == "single" and not r.get("retrieval_only")
+    ]
 
     if len(valid_runs) >= 2:
 
@@ -279,6 +524,65 @@ if history:
         st.success(insight)
 
 
+# --------------------------------------------------
+# LATENCY SLO
+# --------------------------------------------------
+
+if history:
+
+    st.markdown("---")
+    st.header("Tail Latency")
+
+    st.caption("Latency percentiles per configuration, checked against the sidebar SLO")
+
+    mode_filter = st.multiselect(
+        "Retrieval Strategies",
+        ["dense", "bm25", "hybrid"],
+        default=["dense", "bm25", "hybrid"]
+    )
+
+    report = latency_report(
+        history,
+        where={"retrieval_mode": mode_filter, "retrieval_only": False},
+        slo={"total_latency": {slo_percentile: slo_seconds}}
+    )
+
+    if report["configs"]:
+
+        overall = report["overall"]["total_latency"]
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("p50 (s)", overall["p50"])
+        c2.metric("p95 (s)", overall["p95"])
+        c3.metric("p99 (s)", overall["p99"])
+        c4.metric("Runs / s", overall["throughput"])
+
+        st.dataframe(
+            [
+                {
+                    "retrieval_mode": row["config"]["retrieval_mode"],
+                    "chunk_size": row["config"]["chunk_size"],
+                    "top_k": row["config"]["top_k"],
+                    "runs": row["stages"]["total_latency"]["runs"],
+                    **{
+                        f"{stage} {p}": row["stages"][stage][p]
+                        for stage in ("retrieval_time", "generation_time", "total_latency")
+                        for p in ("p50", "p95", "p99")
+                    },
+                    "slo_ok": not row["slo_violations"]
+                }
+                for row in report["configs"]
+            ],
+            use_container_width=True
+        )
+
+        violating = [row for row in report["configs"] if row["slo_violations"]]
+        if violating:
+            st.error(
+                f"{len(violating)} configuration(s) exceed {slo_percentile} ≤ {slo_seconds:g}s"
+            )
+
+
 # --------------------------------------------------
 # BEST CONFIG
 # --------------------------------------------------
@@ -292,3 +596,93 @@ if history:
 
     if best:
         st.json(best)
+
+
+# --------------------------------------------------
+# PARETO FRONTIER
+# --------------------------------------------------
+
+if history:
+
+    st.markdown("---")
+    st.header("Pareto Frontier")
+
+    st.caption("Non-dominated configurations across richness, diversity, latency and stability")
+
+    objective_options = {
+        "richness": "max",
+        "diversity": "max",
+        "latency": "min",
+        "stability": "max",
+        "gap_density": "max",
+        "output_length": "max"
+    }
+
+    selected_objectives = st.multiselect(
+        "Research Objectives",
+        list(objective_options),
+        default=["richness", "diversity", "latency", "stability"]
+    )
+
+    if selected_objectives:
+
+        front = select_pareto_configs(
+            history,
+            {name: objective_options[name] for name in selected_objectives}
+        )
+
+        if front:
+            st.dataframe(
+                [
+                    {"score": r["score"], **r["objectives"], **r["config"]}
+                    for r in front
+                ],
+                use_container_width=True
+            )
+
+
+# --------------------------------------------------
+# PROFILES
+# --------------------------------------------------
+
+profiled_runs = [
+    r for r in history
+    if r.get("profile") and os.path.exists(r["profile"]["pstats"])
+] if history else []
+
+if profiled_runs:
+
+    st.markdown("---")
+    st.header("Run Profiles")
+
+    st.caption("Where profiled runs spend their time, by cumulative time")
+
+    labels = {
+        f"{r['timestamp']} · {r['config']['retrieval_mode']} · "
+        f"chunk {r['config']['chunk_size']}": r
+        for r in reversed(profiled_runs)
+    }
+
+    selected = labels[st.selectbox("Profiled Run", list(labels))]
+
+    st.dataframe(
+        top_functions(selected["profile"]["pstats"], limit=25),
+        use_container_width=True
+    )
+
+    if os.path.exists(selected["profile"]["collapsed"]):
+        with open(selected["profile"]["collapsed"]) as f:
+            st.download_button(
+                "Download collapsed stacks (flame graph input)",
+                f.read(),
+                file_name=os.path.basename(selected["profile"]["collapsed"])
+            )
+
+
+# --------------------------------------------------
+# JOB POLLING
+# --------------------------------------------------
+
+if jobs and auto_refresh and any(j["status"] in ("queued", "running") for j in jobs):
+    time.sleep(2)
+    st.rerun()
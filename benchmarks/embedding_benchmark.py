@@ -0,0 +1,128 @@
+"""
+Throughput and retrieval agreement of the embedding backends against the
+PyTorch baseline ("local") on the sample corpus.
+
+    python -m benchmarks.embedding_benchmark --pdf sample.pdf --top-k 5
+
+For each backend: model load time, chunks/sec, mean cosine of its chunk
+vectors to the baseline's, and overlap of its dense top-k with the
+baseline's top-k per query. Backends whose dependencies are missing are
+reported and skipped.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.embedding.local_embedding import EMBEDDING_MODELS, embed_local, get_model
+from pipeline.evaluation.records import id_overlap
+
+
+QUERIES = [
+    "What research gaps exist?",
+    "What are the limitations of this study?",
+    "What future work is proposed?",
+    "Which results remain uncertain?",
+    "What methods were used?"
+]
+
+
+def load_chunks(pdf_path, chunk_size, overlap):
+
+    from utils.pdf_loader import load_pdf
+    from pipeline.chunking.chunker import fixed_chunk_document
+
+    return fixed_chunk_document(load_pdf(pdf_path), chunk_size, overlap)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def top_k(chunk_vectors, query_vectors, k):
+    scores = _normalize(query_vectors) @ _normalize(chunk_vectors).T
+    return [list(np.argsort(-row)[:k]) for row in scores]
+
+
+def measure(name, chunks, repeats):
+
+    start = time.perf_counter()
+    get_model(name)
+    load_time = time.perf_counter() - start
+
+    embed_local(chunks[:8], name)  # first-call overhead
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        vectors = embed_local(chunks, name)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    return {
+        "backend": name,
+        "load_s": round(load_time, 2),
+        "chunks_per_s": round(len(chunks) / elapsed, 1),
+        "vectors": vectors,
+        "query_vectors": embed_local(QUERIES, name)
+    }
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.embedding_benchmark")
+    parser.add_argument("--pdf", default="sample.pdf")
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--overlap", type=int, default=150)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_MODELS))
+    args = parser.parse_args(argv)
+
+    chunks = load_chunks(args.pdf, args.chunk_size, args.overlap)
+    print(f"{len(chunks)} chunks from {args.pdf}\n")
+
+    rows = []
+
+    for name in dict.fromkeys(["local"] + args.backends):
+        try:
+            rows.append(measure(name, chunks, args.repeats))
+        except Exception as e:  # missing torch / optimum / onnxruntime
+            print(f"{name}: skipped ({type(e).__name__}: {e})")
+
+    if not rows or rows[0]["backend"] != "local":
+        print("Baseline backend unavailable")
+        return 1
+
+    baseline = rows[0]
+    baseline_top = top_k(baseline["vectors"], baseline["query_vectors"], args.top_k)
+
+    print(f"{'backend':<12}{'load s':>8}{'chunks/s':>10}{'speedup':>9}{'cosine':>8}{'top-k overlap':>15}")
+
+    for r in rows:
+
+        cosine = float(np.mean(np.sum(
+            _normalize(r["vectors"]) * _normalize(baseline["vectors"]), axis=1
+        )))
+
+        overlap = np.mean([
+            id_overlap(a, b)
+            for a, b in zip(top_k(r["vectors"], r["query_vectors"], args.top_k), baseline_top)
+        ])
+
+        print(
+            f"{r['backend']:<12}{r['load_s']:>8}{r['chunks_per_s']:>10}"
+            f"{r['chunks_per_s'] / baseline['chunks_per_s']:>9.2f}"
+            f"{cosine:>8.3f}{overlap:>15.3f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
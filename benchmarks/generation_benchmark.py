@@ -0,0 +1,103 @@
+"""
+Cold start and connection overhead of the generation backends, measured
+against the local stand-in server (no model needed).
+
+    python -m benchmarks.generation_benchmark --requests 200 --cold-start 1.5
+
+Exits non-zero if a check fails: warm-up must absorb the cold start,
+pooled connections must be reused, temperature and prompt mode must
+reach the server, and the static prompt prefix must be byte-identical
+across requests.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.stub_llm_server import start_stub_server
+from pipeline.generation.backends import OllamaBackend, OpenAICompatibleBackend
+from pipeline.generation.prompt_modes import build_messages
+
+
+QUERIES = [
+    "What research gaps exist?",
+    "What are the limitations of this study?",
+    "What future work is proposed?"
+]
+
+
+def run(backend, model, requests):
+
+    cold_start = backend.warm_up()
+    model.requests.clear()  # the OpenAI warm-up is a real (1-token) request
+
+    start = time.perf_counter()
+    for i in range(requests):
+        backend.generate(
+            build_messages(QUERIES[i % len(QUERIES)], [f"context {i}"], "structured"),
+            0.3
+        )
+    elapsed = time.perf_counter() - start
+
+    stats = backend.stats()
+    prefixes = {json.dumps(r["messages"][0]) for r in model.requests}
+
+    return {
+        "backend": backend.name,
+        "pool_size": backend.pool.size,
+        "cold_start": round(cold_start, 3),
+        "ms_per_request": round(1000 * elapsed / requests, 3),
+        "connections_opened": stats["connections_opened"],
+        "connection_ms_per_request": round(1000 * stats["mean_connection_overhead"], 3),
+        "temperature_sent": all(r["temperature"] == 0.3 for r in model.requests),
+        "stable_prefix": len(prefixes) == 1
+    }
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generation_benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cold-start", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    rows = []
+
+    for cls, prefix in ((OllamaBackend, ""), (OpenAICompatibleBackend, "/v1")):
+        for pool_size in (4, 0):
+
+            server, model = start_stub_server(cold_start=args.cold_start)
+            url = f"http://127.0.0.1:{server.server_address[1]}{prefix}"
+
+            backend = cls(url)
+            backend.pool.size = pool_size
+
+            rows.append(run(backend, model, args.requests))
+            server.shutdown()
+
+    print(f"{'backend':<10}{'pool':>6}{'cold s':>9}{'ms/req':>9}{'conns':>7}{'conn ms/req':>13}")
+    for r in rows:
+        print(
+            f"{r['backend']:<10}{r['pool_size']:>6}{r['cold_start']:>9}"
+            f"{r['ms_per_request']:>9}{r['connections_opened']:>7}{r['connection_ms_per_request']:>13}"
+        )
+
+    failed = [
+        r for r in rows
+        if not (r["temperature_sent"] and r["stable_prefix"])
+        or r["cold_start"] < 0.9 * args.cold_start
+        or (r["pool_size"] and r["connections_opened"] > r["pool_size"])
+    ]
+
+    for r in failed:
+        print(f"FAILED: {r}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Replay a query workload against the pipeline under concurrent load.
+
+The workload is JSONL, one request per line:
+
+    {"document": "data/uploads/paper.pdf", "query": "What research gaps exist?",
+     "config": {"retrieval_mode": "hybrid", "top_k": 5}, "retrieval_only": false}
+
+config fields not given take the app defaults. Closed loop (fixed number
+of concurrent users) or open loop (fixed arrival rate):
+
+    python -m benchmarks.load_test workload.jsonl --concurrency 4 --iterations 3
+    python -m benchmarks.load_test workload.jsonl --rate 2 --duration 60 --offline
+    python -m benchmarks.load_test workload.jsonl --concurrency 8 --url http://127.0.0.1:8765
+
+Every request runs the pipeline (retrieval cache bypassed). --result-store
+goes through the memoised result store instead, as the app does; repeated
+requests are then store hits, reported separately from misses.
+--offline forces the deterministic fallback generator so the test needs
+no LLM. In open-loop mode latency is measured from each request's
+scheduled start, so queueing behind slow requests is included.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.config_schema import config_from_dict
+from pipeline.evaluation.latency import LatencyHistogram
+
+
+# ----------------------------
+# Workload
+# ----------------------------
+
+def load_workload(path, offline=False):
+
+    workload = []
+
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            config = dict(item.get("config", {}))
+
+            if offline:
+                config["generation_backend"] = "fallback"
+
+            workload.append({
+                "document": item["document"],
+                "query": item["query"],
+                "config": config_from_dict(config),
+                "retrieval_only": item.get("retrieval_only", False)
+            })
+
+    if not workload:
+        raise ValueError(f"Empty workload: {path}")
+
+    return workload
+
+
+# ----------------------------
+# Targets
+# ----------------------------
+
+def pipeline_target(use_result_store=False):
+    """
+    Call the pipeline in-process: straight into run_pipeline by default,
+    bypassing the retrieval cache so every request really retrieves, or
+    through the result store (as the app does).
+    """
+
+    if use_result_store:
+        from utils.result_store import cached_run_pipeline
+
+        def call(item):
+            return cached_run_pipeline(
+                item["config"], item["document"], item["query"],
+                retrieval_only=item["retrieval_only"]
+            )
+    else:
+        from pipeline.orchestrator import run_pipeline
+
+        def call(item):
+            return run_pipeline(
+                item["config"], item["document"], item["query"],
+                retrieval_only=item["retrieval_only"],
+                retrieval_cache=False
+            )
+
+    return call
+
+
+def service_target(url):
+    """
+    Send each request to a running service.server instead.
+    """
+
+    from service.client import PipelineClient
+
+    client = PipelineClient(url, retries=0)
+
+    def call(item):
+        return client.query(
+            item["document"], item["query"],
+            config=vars(item["config"]),
+            retrieval_only=item["retrieval_only"]
+        )
+
+    return call
+
+
+# ----------------------------
+# Load generation
+# ----------------------------
+
+def _execute(target, item, scheduled):
+
+    record = {
+        "error": None,
+        "result_cache_hit": None,
+        "embedding_cache_hit": None,
+        "retrieval_cache_hit": None
+    }
+
+    try:
+        result = target(item)
+        record["result_cache_hit"] = result.get("cache", {}).get("hit")
+        record["embedding_cache_hit"] = result.get("debug", {}).get("embedding_cache_hit")
+        record["retrieval_cache_hit"] = result.get("debug", {}).get("retrieval_cache_hit")
+    except Exception as e:
+        record["error"] = type(e).__name__
+
+    record["latency"] = time.perf_counter() - scheduled
+
+    return record
+
+
+def run_closed_loop(workload, target, concurrency=1, iterations=1):
+    """
+    concurrency workers, each sending its next request as soon as the
+    previous one returns, until the workload has been replayed
+    iterations times.
+    """
+
+    items = [item for _ in range(iterations) for item in workload]
+    records = []
+    lock = threading.Lock()
+    position = [0]
+
+    def worker():
+        while True:
+            with lock:
+                if position[0] >= len(items):
+                    return
+                item = items[position[0]]
+                position[0] += 1
+
+            record = _execute(target, item, time.perf_counter())
+
+            with lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return records
+
+
+def run_open_loop(workload, target, rate, duration, max_workers=64):
+    """
+    Start requests at a fixed rate (per second) for duration seconds,
+    cycling through the workload, regardless of how fast they complete.
+    """
+
+    total = max(1, int(rate * duration))
+    start = time.perf_counter()
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i in range(total):
+
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            futures.append(
+                pool.submit(_execute, target, workload[i % len(workload)], scheduled)
+            )
+
+    return [f.result() for f in futures]
+
+
+# ----------------------------
+# Report
+# ----------------------------
+
+def _ratio(values):
+    known = [v for v in values if v is not None]
+    return round(sum(known) / len(known), 4) if known else None
+
+
+def summarize_load(records, wall_time):
+
+    hist = LatencyHistogram()
+    by_store = {True: LatencyHistogram(), False: LatencyHistogram()}
+    errors = {}
+
+    for r in records:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+        else:
+            hist.record(r["latency"])
+            if r["result_cache_hit"] is not None:
+                by_store[r["result_cache_hit"]].record(r["latency"])
+
+    # Store hits are lookups, not pipeline runs: report them apart
+    split = {}
+    for label, h in (("hit", by_store[True]), ("miss", by_store[False])):
+        if h.count:
+            split[f"result_store_{label}_p50"] = round(h.percentile(50), 4)
+            split[f"result_store_{label}_p95"] = round(h.percentile(95), 4)
+
+    return {
+        "requests": len(records),
+        "wall_time": round(wall_time, 3),
+        "throughput": round(hist.count / wall_time, 4) if wall_time else 0.0,
+        "p50": round(hist.percentile(50), 4),
+        "p95": round(hist.percentile(95), 4),
+        "p99": round(hist.percentile(99), 4),
+        "max": round(hist.max, 4),
+        "error_rate": round(sum(errors.values()) / len(records), 4) if records else 0.0,
+        "errors": errors,
+        "result_cache_hit_ratio": _ratio([r["result_cache_hit"] for r in records]),
+        "embedding_cache_hit_ratio": _ratio([r["embedding_cache_hit"] for r in records]),
+        "retrieval_cache_hit_ratio": _ratio([r["retrieval_cache_hit"] for r in records]),
+        **split
+    }
+
+
+def run_load_test(
+    workload,
+    target,
+    concurrency=1,
+    iterations=1,
+    rate=None,
+    duration=None
+):
+    """
+    Closed loop by default; open loop when rate and duration are given.
+    """
+
+    start = time.perf_counter()
+
+    if rate is not None:
+        records = run_open_loop(workload, target, rate, duration)
+    else:
+        records = run_closed_loop(workload, target, concurrency, iterations)
+
+    return summarize_load(records, time.perf_counter() - start)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test")
+    parser.add_argument("workload", help="JSONL of {document, query, config}")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--rate", type=float, help="requests per second (open loop)")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--offline", action="store_true", help="fallback generator, no LLM")
+    parser.add_argument("--result-store", action="store_true",
+                        help="go through the memoised result store, as the app does")
+    parser.add_argument("--url", help="replay against a running service.server")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    workload = load_workload(args.workload, offline=args.offline)
+    if args.url:
+        target = service_target(args.url)
+    else:
+        target = pipeline_target(use_result_store=args.result_store)
+
+    report = run_load_test(
+        workload,
+        target,
+        concurrency=args.concurrency,
+        iterations=args.iterations,
+        rate=args.rate,
+        duration=args.duration if args.rate else None
+    )
+
+    for name, value in report.items():
+        print(f"{name:<28}{value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if report["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Recall@k, memory and disk use of compressed vector storage vs the float32
+path. "-approx" rows re-score from dequantized rows instead of the float32
+file (PipelineConfig.full_precision_rescore=False).
+
+    python -m benchmarks.quantization_benchmark --pdf sample.pdf
+    python -m benchmarks.quantization_benchmark --synthetic 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.embedding.quantization import (
+    STORAGE_MODES,
+    is_quantized,
+    quantize_vectors,
+    save_full_precision,
+    store_nbytes
+)
+from pipeline.retrieval.dense import (
+    dense_retrieve_indices,
+    quantized_dense_retrieve_indices
+)
+
+
+QUERIES = [
+    "What research gaps exist?",
+    "What are the limitations of this study?",
+    "What future work is proposed?",
+    "Which results remain uncertain?",
+    "What methods were used?"
+]
+
+
+def load_sample_vectors(pdf_path, chunk_size, overlap):
+    from utils.pdf_loader import load_pdf
+    from pipeline.chunking.chunker import fixed_chunk_document
+    from pipeline.embedding.local_embedding import embed_local
+
+    chunks = fixed_chunk_document(load_pdf(pdf_path), chunk_size, overlap)
+    return embed_local(chunks), embed_local(QUERIES)
+
+
+def synthetic_vectors(n, dim, n_queries, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    queries = vectors[rng.choice(n, n_queries, replace=False)]
+    queries = queries + 0.5 * rng.normal(size=queries.shape).astype(np.float32)
+    return vectors, queries
+
+
+def exact_top_k(query_vector, vectors, k):
+    sims = vectors @ query_vector / (
+        np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector) + 1e-12
+    )
+    return set(np.argsort(sims)[::-1][:k].tolist())
+
+
+def search(query_vector, store, k, lambda_param, rescore_depth):
+    if is_quantized(store):
+        return quantized_dense_retrieve_indices(
+            query_vector, store, k, lambda_param, rescore_depth
+        )
+    return dense_retrieve_indices(query_vector, store, k, lambda_param)
+
+
+def run(vectors, queries, k, rescore_depth, workdir):
+
+    full_path = os.path.join(workdir, "full.f32.npy")
+    save_full_precision(vectors, full_path)
+
+    rows = []
+
+    # Compressed modes with and without the float32 file for re-scoring
+    variants = [(s, full_path) for s in STORAGE_MODES]
+    variants += [(s, None) for s in STORAGE_MODES if s != "float32"]
+
+    for storage, path in variants:
+
+        store = quantize_vectors(vectors, storage, path)
+        rescored = path is not None and storage != "float32"
+
+        topk_recall = []
+        mmr_recall = []
+        elapsed = 0
+
+        for q in queries:
+            baseline_mmr, _ = dense_retrieve_indices(q, vectors, k)
+
+            start = time.time()
+            got_mmr, _ = search(q, store, k, 0.7, rescore_depth)
+            elapsed += time.time() - start
+
+            # Plain ranking (lambda=1 disables the diversity term)
+            baseline = exact_top_k(q, vectors, k)
+            got, _ = search(q, store, k, 1.0, rescore_depth)
+
+            topk_recall.append(len(baseline & set(got)) / k)
+            mmr_recall.append(len(set(baseline_mmr) & set(got_mmr)) / k)
+
+        rows.append({
+            "storage": storage if path else f"{storage}-approx",
+            "bytes": store_nbytes(store),
+            "disk_bytes": store_nbytes(store) + (vectors.nbytes if rescored else 0),
+            "recall_at_k": float(np.mean(topk_recall)),
+            "mmr_agreement": float(np.mean(mmr_recall)),
+            "ms_per_query": 1000 * elapsed / len(queries)
+        })
+
+    return rows
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", default="sample.pdf")
+    parser.add_argument("--chunk-size", type=int, default=400)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--synthetic", type=int, default=0, help="number of random vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-depth", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors, queries = synthetic_vectors(args.synthetic, args.dim, args.queries)
+    else:
+        vectors, queries = load_sample_vectors(args.pdf, args.chunk_size, args.overlap)
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = run(vectors, queries, min(args.k, len(vectors)), args.rescore_depth, workdir)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, k={args.k}")
+    print(f"{'storage':<14}{'KB':>12}{'disk KB':>12}{'recall@k':>12}{'mmr agree':>12}{'ms/query':>12}")
+
+    for r in rows:
+        print(
+            f"{r['storage']:<14}{r['bytes'] / 1024:>12.1f}{r['disk_bytes'] / 1024:>12.1f}"
+            f"{r['recall_at_k']:>12.3f}"
+            f"{r['mmr_agreement']:>12.3f}{r['ms_per_query']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
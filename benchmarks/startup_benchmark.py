@@ -0,0 +1,218 @@
+"""
+Cold-start cost of the entry points: `python -X importtime` totals for
+the top-level imports of app.py and test_run.py, which deferred heavy
+dependencies those imports pull in, and the app's time to first render
+(streamlit's AppTest, run from an empty working directory).
+
+    python -m benchmarks.startup_benchmark --budget 2.0 --render-budget 5.0
+
+Exits non-zero if an entry point loads a deferred dependency at startup
+or goes over budget, so a regression to eager loading fails.
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_POINTS = ("app.py", "test_run.py")
+
+# Loaded on first use only (see pipeline/embedding/local_embedding.py,
+# utils/best_config_selector.py, pipeline/retrieval/dense.py, the
+# visualisers and pipeline/generation/backends.py)
+DEFERRED_MODULES = (
+    "sentence_transformers",
+    "torch",
+    "transformers",
+    "sklearn",
+    "faiss",
+    "plotly",
+    "ollama"
+)
+
+PROBE_START = "--- entry point imports ---"
+
+IMPORT_PROBE = """
+import sys, json
+print({marker!r}, file=sys.stderr, flush=True)
+{imports}
+print(json.dumps(sorted(m for m in {deferred!r} if m in sys.modules)))
+"""
+
+RENDER_PROBE = """
+import sys, json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout={timeout}).run()
+print(json.dumps({{
+    "first_render": time.perf_counter() - start,
+    "exceptions": [str(e.value) for e in at.exception],
+    "deferred_loaded": sorted(m for m in {deferred!r} if m in sys.modules)
+}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+# --------------------------------------------
+# PROBES
+# --------------------------------------------
+
+def top_level_imports(path):
+    """
+    Source of the module-level import statements of a script.
+    """
+
+    with open(path) as f:
+        tree = ast.parse(f.read())
+
+    return "\n".join(
+        ast.unparse(node) for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def _run(code, *flags, timeout=300):
+    """
+    Run code in a fresh interpreter with the repo importable, from an
+    empty directory so no local data (history, caches) is picked up.
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+    with tempfile.TemporaryDirectory() as cwd:
+        return subprocess.run(
+            [sys.executable, *flags, "-c", code],
+            cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout
+        )
+
+
+def parse_importtime(stderr, top=5):
+    """
+    Total seconds of the top-level imports after PROBE_START (so not
+    the interpreter's own startup imports) and the slowest of them.
+    """
+
+    rows = []
+
+    for line in stderr.split(PROBE_START, 1)[-1].splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not match.group(3):
+            rows.append((int(match.group(2)) / 1e6, match.group(4)))
+
+    rows.sort(reverse=True)
+
+    return sum(seconds for seconds, _ in rows), [
+        {"module": name, "seconds": round(seconds, 3)} for seconds, name in rows[:top]
+    ]
+
+
+def measure_imports(script):
+
+    proc = _run(
+        IMPORT_PROBE.format(
+            marker=PROBE_START,
+            imports=top_level_imports(os.path.join(ROOT, script)),
+            deferred=DEFERRED_MODULES
+        ),
+        "-X", "importtime"
+    )
+
+    if proc.returncode != 0:
+        return {"script": script, "error": proc.stderr.strip().splitlines()[-1]}
+
+    total, slowest = parse_importtime(proc.stderr)
+
+    return {
+        "script": script,
+        "import_seconds": round(total, 3),
+        "slowest": slowest,
+        "deferred_loaded": json.loads(proc.stdout.strip().splitlines()[-1])
+    }
+
+
+def measure_first_render(script="app.py", timeout=120):
+
+    proc = _run(
+        RENDER_PROBE.format(
+            path=os.path.join(ROOT, script), timeout=timeout, deferred=DEFERRED_MODULES
+        ),
+        timeout=timeout + 60
+    )
+
+    if proc.returncode != 0:
+        return {"script": script, "error": proc.stderr.strip().splitlines()[-1]}
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["first_render"] = round(result["first_render"], 3)
+
+    return dict(result, script=script)
+
+
+# --------------------------------------------
+# MAIN
+# --------------------------------------------
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup_benchmark")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="max seconds of top-level imports per entry point")
+    parser.add_argument("--render-budget", type=float, default=5.0,
+                        help="max seconds to the app's first render")
+    parser.add_argument("--skip-render", action="store_true")
+    args = parser.parse_args(argv)
+
+    failures = []
+
+    print(f"{'entry point':<14}{'import s':>10}  slowest top-level imports")
+
+    for script in ENTRY_POINTS:
+
+        r = measure_imports(script)
+
+        if "error" in r:
+            print(f"{script:<14}{'-':>10}  error: {r['error']}")
+            failures.append(f"{script}: imports failed")
+            continue
+
+        slowest = ", ".join(f"{s['module']} {s['seconds']}" for s in r["slowest"])
+        print(f"{script:<14}{r['import_seconds']:>10}  {slowest}")
+
+        if r["deferred_loaded"]:
+            failures.append(f"{script}: loads {', '.join(r['deferred_loaded'])} at import")
+        if r["import_seconds"] > args.budget:
+            failures.append(f"{script}: imports take {r['import_seconds']} s > {args.budget} s")
+
+    if not args.skip_render:
+
+        r = measure_first_render()
+
+        if "error" in r:
+            print(f"first render: error: {r['error']}")
+            failures.append("app.py: first render failed")
+        else:
+            print(f"first render: {r['first_render']} s")
+
+            if r["exceptions"]:
+                failures.append(f"app.py: exceptions on first render: {r['exceptions']}")
+            if r["deferred_loaded"]:
+                failures.append(f"app.py: loads {', '.join(r['deferred_loaded'])} before first render")
+            if r["first_render"] > args.render_budget:
+                failures.append(f"app.py: first render {r['first_render']} s > {args.render_budget} s")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Local stand-in for an LLM server, speaking enough of the Ollama and
+OpenAI-compatible APIs for the generation backends.
+
+    python -m benchmarks.stub_llm_server --port 11434 --cold-start 2 --latency 0.05
+
+Replies are deterministic (a digest of the prompt). The first request
+that needs the model pays --cold-start seconds, like a model load.
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubModel:
+
+    def __init__(self, cold_start=0.0, latency=0.0):
+        self.cold_start = cold_start
+        self.latency = latency
+        self.loaded = False
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if not self.loaded:
+                time.sleep(self.cold_start)
+                self.loaded = True
+
+    def reply(self, messages, temperature):
+
+        self.load()
+        time.sleep(self.latency)
+
+        self.requests.append({"messages": messages, "temperature": temperature})
+
+        prompt = json.dumps(messages, sort_keys=True).encode()
+        return f"[stub {hashlib.sha256(prompt).hexdigest()[:12]} t={temperature}]"
+
+
+def make_handler(model):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+
+            # Liveness probes (see HTTPBackend.probe)
+            if self.path == "/api/version":
+                self._send(200, {"version": "stub"})
+
+            elif self.path == "/v1/models":
+                self._send(200, {"data": [{"id": "stub"}]})
+
+            else:
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def do_POST(self):
+
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path == "/api/generate":
+                model.load()
+                self._send(200, {"model": payload.get("model"), "response": "", "done": True})
+
+            elif self.path == "/api/chat":
+                content = model.reply(
+                    payload["messages"], payload.get("options", {}).get("temperature")
+                )
+                self._send(200, {
+                    "model": payload.get("model"),
+                    "message": {"role": "assistant", "content": content},
+                    "done": True
+                })
+
+            elif self.path == "/v1/chat/completions":
+                content = model.reply(payload["messages"], payload.get("temperature"))
+                self._send(200, {
+                    "model": payload.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]
+                })
+
+            else:
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(port=0, cold_start=0.0, latency=0.0):
+    """
+    Serve in a background thread. Returns (server, model); the bound port
+    is server.server_address[1].
+    """
+
+    model = StubModel(cold_start, latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(model))
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, model
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stub_llm_server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--cold-start", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server, _ = start_stub_server(args.port, args.cold_start, args.latency)
+    print(f"Stub LLM server on http://127.0.0.1:{server.server_address[1]}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,41 +2,49 @@ import re
 from pipeline.chunking.adaptive_chunker import adaptive_chunk_document
 
 
+# Everything from the first match of any of these onward is dropped
+PATTERNS_TO_REMOVE = [
+    r"Acknowledgments.*",
+    r"References.*",
+    r"Institutional Review Board Statement.*",
+    r"Data Availability Statement.*",
+    r"Funding:.*"
+]
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Earliest match of any removal pattern (the truncation point of clean_text)
+REMOVAL_START = re.compile(
+    "|".join(p[:-len(".*")] for p in PATTERNS_TO_REMOVE),
+    re.IGNORECASE
+)
+
+
 def clean_text(text: str):
     """
     Remove low-value sections like acknowledgments and references.
     """
 
-    patterns_to_remove = [
-        r"Acknowledgments.*",
-        r"References.*",
-        r"Institutional Review Board Statement.*",
-        r"Data Availability Statement.*",
-        r"Funding:.*"
-    ]
-
-    for pattern in patterns_to_remove:
+    for pattern in PATTERNS_TO_REMOVE:
         text = re.sub(pattern, "", text, flags=re.IGNORECASE | re.DOTALL)
 
     return text
 
 
-def fixed_chunk_document(text: str, chunk_size: int, overlap: int):
+def pack_sentences(sentences, chunk_size: int, overlap: int):
     """
-    Sentence-aware fixed-size chunking with character-based overlap.
+    Greedily pack sentences into chunks of about chunk_size characters,
+    carrying the last `overlap` characters into the next chunk. Yields
+    each chunk as soon as it is complete.
     """
 
-    text = clean_text(text)
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-
-    chunks = []
     current_chunk = ""
 
     for sentence in sentences:
         if len(current_chunk) + len(sentence) <= chunk_size:
             current_chunk += " " + sentence
         else:
-            chunks.append(current_chunk.strip())
+            yield current_chunk.strip()
 
             if overlap > 0 and len(current_chunk) > overlap:
                 current_chunk = current_chunk[-overlap:] + " " + sentence
@@ -44,9 +52,67 @@ def fixed_chunk_document(text: str, chunk_size: int, overlap: int):
                 current_chunk = sentence
 
     if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+        yield current_chunk.strip()
+
+
+def fixed_chunk_document(text: str, chunk_size: int, overlap: int):
+    """
+    Sentence-aware fixed-size chunking with character-based overlap.
+    """
+
+    text = clean_text(text)
+    sentences = SENTENCE_BOUNDARY.split(text)
+
+    return list(pack_sentences(sentences, chunk_size, overlap))
+
+
+# --------------------------------------------
+# STREAMING
+# --------------------------------------------
+
+def stream_sentences(pages):
+    """
+    Sentences of a document given as an iterable of page texts, split
+    exactly as fixed_chunk_document splits the joined, cleaned text.
+
+    Only the unfinished sentence at the end of a page is carried over,
+    and reading stops at the first section clean_text would remove.
+    """
+
+    carry = ""
+
+    for page in pages:
+        buffer = carry + page
+
+        cut = REMOVAL_START.search(buffer)
+        if cut:
+            yield from SENTENCE_BOUNDARY.split(buffer[:cut.start()])
+            return
 
-    return chunks
+        # A boundary touching the end of the buffer may continue into the
+        # next page (more whitespace), so it is not final yet
+        last = None
+        for match in SENTENCE_BOUNDARY.finditer(buffer):
+            if match.end() < len(buffer):
+                last = match
+
+        if last is None:
+            carry = buffer
+            continue
+
+        yield from SENTENCE_BOUNDARY.split(buffer[:last.start()])
+        carry = buffer[last.end():]
+
+    yield from SENTENCE_BOUNDARY.split(carry)
+
+
+def stream_fixed_chunks(pages, chunk_size: int, overlap: int):
+    """
+    fixed_chunk_document over an iterable of page texts, yielding chunks
+    as pages arrive. Produces the same chunks as the batch version.
+    """
+
+    return pack_sentences(stream_sentences(pages), chunk_size, overlap)
 
 
 def chunk_document(
@@ -73,3 +139,21 @@ def chunk_document(
 
     # Default: fixed mode
     return fixed_chunk_document(text, chunk_size, overlap)
+
+
+def chunk_for_config(text: str, config):
+    """
+    Chunk text the way the pipeline does for a PipelineConfig.
+    """
+
+    if config.chunking_mode == "adaptive":
+        return adaptive_chunk_document(text)
+
+    if config.chunk_size is None:
+        raise ValueError("chunk_size cannot be None in fixed mode")
+
+    return fixed_chunk_document(
+        text,
+        config.chunk_size,
+        config.chunk_overlap
+    )
@@ -4,7 +4,7 @@ from .local_embedding import embed_local
 
 def embed_chunks(chunks, model_type="local"):
     """
-    Embed text chunks using LOCAL embedding backend only.
+    Embed text chunks with a local embedding backend.
 
     Parameters
     ----------
@@ -12,7 +12,8 @@ def embed_chunks(chunks, model_type="local"):
         Text chunks to embed.
 
     model_type : str
-        Ignored. Kept only for pipeline compatibility.
+        PipelineConfig.embedding_model, one of
+        local_embedding.EMBEDDING_MODELS.
 
     Returns
     -------
@@ -22,7 +23,7 @@ def embed_chunks(chunks, model_type="local"):
 
     start = time.time()
 
-    vectors = embed_local(chunks)
+    vectors = embed_local(chunks, model_type)
 
     elapsed = time.time() - start
 
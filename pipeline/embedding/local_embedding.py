@@ -1,8 +1,81 @@
-from sentence_transformers import SentenceTransformer
+import threading
+from importlib.util import find_spec
+
 import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# PipelineConfig.embedding_model values. All are the same MiniLM model, so
+# vector dimensions match, but each has its own cache entries (the
+# embedding_model is part of every cache key).
+#
+#   local      : PyTorch SentenceTransformer (the baseline)
+#   torch-int8 : PyTorch with Linear layers dynamically quantised to int8
+#   onnx       : ONNX Runtime export (needs optimum[onnxruntime])
+#   onnx-int8  : ONNX Runtime, int8-quantised export shipped with the model
+EMBEDDING_MODELS = ("local", "torch-int8", "onnx", "onnx-int8")
+
+DEFAULT_EMBEDDING_MODEL = "local"
+
+# Packages a backend needs beyond sentence-transformers (and torch)
+EMBEDDING_MODEL_EXTRAS = {
+    "onnx": ("optimum", "onnxruntime"),
+    "onnx-int8": ("optimum", "onnxruntime")
+}
+
+EXTRAS_INSTALL_HINT = "pip install optimum[onnxruntime]"
+
+# Quantised ONNX file in the model repo (AVX2 kernels, x86 CPUs)
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+# Loaded on first use: importing sentence_transformers pulls in torch
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _load(name):
+
+    from sentence_transformers import SentenceTransformer
+
+    if name == "local":
+        return SentenceTransformer(MODEL_NAME)
+
+    if name == "torch-int8":
+        import torch
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if name == "onnx":
+        return SentenceTransformer(MODEL_NAME, backend="onnx")
+
+    if name == "onnx-int8":
+        return SentenceTransformer(
+            MODEL_NAME, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE}
+        )
+
+    raise ValueError(f"Invalid embedding model: {name}")
+
+
+def available_embedding_models():
+    """
+    Backends whose extra packages are installed. Checked with find_spec,
+    so nothing is imported.
+    """
+
+    return tuple(
+        name for name in EMBEDDING_MODELS
+        if all(find_spec(package) for package in EMBEDDING_MODEL_EXTRAS.get(name, ()))
+    )
+
+
+def get_model(name=DEFAULT_EMBEDDING_MODEL):
+
+    with _models_lock:
+        if name not in _models:
+            _models[name] = _load(name)
+        return _models[name]
+
 
-def embed_local(chunks):
-    embeddings = model.encode(chunks, show_progress_bar=False)
+def embed_local(chunks, model_name=DEFAULT_EMBEDDING_MODEL):
+    embeddings = get_model(model_name).encode(chunks, show_progress_bar=False)
     return np.array(embeddings)
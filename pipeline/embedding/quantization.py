@@ -0,0 +1,138 @@
+import os
+import numpy as np
+
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+
+# --------------------------------------------
+# COMPRESSION
+# --------------------------------------------
+
+def save_full_precision(vectors, path):
+    """
+    Write float32 vectors to an .npy file that is later memory-mapped for
+    exact re-scoring, so the full matrix never has to stay in RAM.
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp = path + ".tmp.npy"
+    np.save(tmp, np.asarray(vectors, dtype=np.float32))
+    os.replace(tmp, path)
+
+
+def quantize_vectors(vectors, storage="float32", full_path=None):
+    """
+    Compress a chunk embedding matrix.
+
+    Parameters
+    ----------
+    storage : str
+        "float16", or "int8" with one scale per dimension
+        (x ≈ data * scales). "float32" returns the vectors unchanged.
+
+    full_path : str, optional
+        .npy file holding the float32 originals (see save_full_precision).
+        Used to re-score the shortlist exactly. It takes the uncompressed
+        size again on disk; without it the shortlist is re-scored from
+        dequantized rows.
+
+    Returns
+    -------
+    store : dict or np.ndarray
+    """
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    if storage == "float32":
+        return vectors
+
+    if storage == "float16":
+        data = vectors.astype(np.float16)
+        scales = None
+
+    elif storage == "int8":
+        scales = np.abs(vectors).max(axis=0) / 127
+        scales[scales == 0] = 1
+        data = np.round(vectors / scales).astype(np.int8)
+        scales = scales.astype(np.float32)
+
+    else:
+        raise ValueError(f"Invalid vector storage: {storage}")
+
+    return {
+        "storage": storage,
+        "data": data,
+        "scales": scales,
+        "norms": np.linalg.norm(vectors, axis=1).astype(np.float32),
+        "full_path": full_path
+    }
+
+
+def is_quantized(vectors):
+    return isinstance(vectors, dict) and "storage" in vectors
+
+
+def store_nbytes(vectors):
+    """
+    In-memory size of a vector matrix or compressed store.
+    """
+
+    if not is_quantized(vectors):
+        return np.asarray(vectors).nbytes
+
+    size = vectors["data"].nbytes + vectors["norms"].nbytes
+    if vectors["scales"] is not None:
+        size += vectors["scales"].nbytes
+    return size
+
+
+# --------------------------------------------
+# SEARCH HELPERS
+# --------------------------------------------
+
+def approximate_similarities(query_vector, store, block_size=4096):
+    """
+    Cosine similarity of the query against every compressed row.
+
+    For int8 the per-dimension scales are folded into the query, so the
+    matrix itself is only widened one block at a time.
+    """
+
+    query = np.asarray(query_vector, dtype=np.float32)
+
+    if store["scales"] is not None:
+        query = query * store["scales"]
+
+    data = store["data"]
+    dots = np.empty(len(data), dtype=np.float32)
+
+    for start in range(0, len(data), block_size):
+        block = data[start:start + block_size].astype(np.float32)
+        dots[start:start + block_size] = block @ query
+
+    denom = store["norms"] * np.linalg.norm(query_vector)
+    denom[denom == 0] = 1
+
+    return dots / denom
+
+
+def full_precision_rows(store, rows):
+    """
+    float32 rows for re-scoring: read from the memory-mapped originals when
+    available, otherwise dequantized.
+    """
+
+    path = store.get("full_path")
+
+    if path and os.path.exists(path):
+        full = np.load(path, mmap_mode="r")
+        return np.asarray(full[rows], dtype=np.float32)
+
+    data = store["data"][rows].astype(np.float32)
+
+    if store["scales"] is not None:
+        data *= store["scales"]
+
+    return data
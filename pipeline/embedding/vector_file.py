@@ -0,0 +1,101 @@
+import os
+import numpy as np
+
+
+# --------------------------------------------
+# APPENDABLE .NPY FILE
+# --------------------------------------------
+
+class VectorFileWriter:
+    """
+    Build a float32 (n, dim) .npy file one batch at a time, so the full
+    matrix never has to be in memory. The header is written with a
+    placeholder row count and rewritten on close; numpy pads .npy headers
+    so the row count can grow without changing the header length.
+
+    The file is written next to `path` and only renamed into place by
+    close(), so a reader never sees a half-written matrix.
+
+        with VectorFileWriter(path) as writer:
+            for batch in batches:
+                writer.append(embed(batch))
+        vectors = np.load(path, mmap_mode="r")
+    """
+
+    def __init__(self, path, dim=None):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._tmp = path + ".tmp"
+        self._file = open(self._tmp, "wb")
+        self._header_size = None
+
+    def _header(self):
+        return {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+            "fortran_order": False,
+            "shape": (self.rows, self.dim)
+        }
+
+    def _write_header(self):
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(self._file, self._header())
+        return self._file.tell()
+
+    def append(self, vectors):
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        if vectors.ndim != 2 or not len(vectors):
+            return
+
+        if self._header_size is None:
+            self.dim = self.dim or vectors.shape[1]
+            self._header_size = self._write_header()
+
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(vectors.tobytes())
+        self.rows += len(vectors)
+
+    def close(self):
+        """
+        Finalise the header and move the file into place. Returns the
+        number of rows written.
+        """
+
+        if self._file.closed:
+            return self.rows
+
+        if self._header_size is None:
+            self.dim = self.dim or 0
+            self._header_size = self._write_header()
+
+        if self._write_header() != self._header_size:
+            raise RuntimeError("Vector file header grew past its reserved size")
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        os.replace(self._tmp, self.path)
+        return self.rows
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,106 @@
+import math
+import random
+
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571,
+    6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042
+}
+
+
+def t_critical(dof):
+    """
+    95% t value, using the nearest tabulated dof at or below dof.
+    """
+
+    if dof > 30:
+        return 1.96
+
+    return T_95[max(k for k in T_95 if k <= dof)]
+
+
+# ----------------------------
+# Online statistics
+# ----------------------------
+
+class RunningStats:
+    """
+    Welford running mean / variance. O(1) memory per metric.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def ci_half_width(self):
+        if self.n < 2:
+            return float("inf")
+        return t_critical(self.n - 1) * self.std / math.sqrt(self.n)
+
+    def confidence_interval(self):
+        half = self.ci_half_width()
+        return self.mean - half, self.mean + half
+
+    def stability(self):
+        """
+        1 - coefficient of variation, clipped to [0, 1]. 1 = identical trials.
+        """
+
+        if self.n < 2 or self.mean == 0:
+            return 1.0 if self.variance == 0 else 0.0
+
+        return max(0.0, 1 - self.std / abs(self.mean))
+
+    def to_dict(self):
+        low, high = self.confidence_interval() if self.n > 1 else (self.mean, self.mean)
+        return {
+            "n": self.n,
+            "mean": round(self.mean, 4),
+            "variance": round(self.variance, 4),
+            "ci_low": round(low, 4),
+            "ci_high": round(high, 4),
+            "stability": round(self.stability(), 4)
+        }
+
+
+# ----------------------------
+# Bootstrap
+# ----------------------------
+
+def bootstrap_ci(values, n_resamples=1000, alpha=0.05, seed=0):
+    """
+    Percentile bootstrap confidence interval of the mean.
+    """
+
+    if not values:
+        return None
+
+    rng = random.Random(seed)
+    n = len(values)
+
+    means = sorted(
+        sum(rng.choice(values) for _ in range(n)) / n
+        for _ in range(n_resamples)
+    )
+
+    low = means[int(alpha / 2 * n_resamples)]
+    high = means[min(n_resamples - 1, int((1 - alpha / 2) * n_resamples))]
+
+    return round(low, 4), round(high, 4)
@@ -0,0 +1,127 @@
+import math
+
+
+# Latency components recorded in result["metrics"]
+LATENCY_STAGES = ("embedding_time", "retrieval_time", "generation_time", "total_latency")
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (HDR-style).
+
+    Bucket boundaries grow geometrically by (1 + precision), so every
+    recorded value is reproduced within ~precision/2 relative error
+    regardless of magnitude, memory stays at a few hundred buckets, and
+    histograms with the same settings merge exactly by adding counts.
+    """
+
+    def __init__(self, precision=0.01, min_value=1e-4):
+        self.precision = precision
+        self.min_value = min_value
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket(self, value):
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / math.log1p(self.precision)) + 1
+
+    def _bucket_value(self, bucket):
+        if bucket == 0:
+            return self.min_value
+        # Geometric midpoint of the bucket
+        return self.min_value * (1 + self.precision) ** (bucket - 0.5)
+
+    def record(self, value, n=1):
+
+        value = max(float(value), 0.0)
+        bucket = self._bucket(value)
+
+        self.counts[bucket] = self.counts.get(bucket, 0) + n
+        self.count += n
+        self.total += value * n
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+
+        if (other.precision, other.min_value) != (self.precision, self.min_value):
+            raise ValueError("Cannot merge histograms with different bucket settings")
+
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """
+        Value at percentile q (0-100), nearest-rank.
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(max(self._bucket_value(bucket), self.min), self.max)
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            "precision": self.precision,
+            "min_value": self.min_value,
+            "counts": {str(b): n for b, n in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+
+        hist = cls(data["precision"], data["min_value"])
+        hist.counts = {int(b): n for b, n in data["counts"].items()}
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.min = data["min"] if data["min"] is not None else math.inf
+        hist.max = data["max"]
+
+        return hist
+
+
+def stage_latency(metrics, stage):
+    """
+    One latency component of a run's metrics. Runs logged before
+    retrieval_time was recorded get it as the remainder of the total.
+    """
+
+    if stage in metrics:
+        return metrics[stage]
+
+    if stage == "retrieval_time":
+        return max(
+            metrics.get("total_latency", 0)
+            - metrics.get("embedding_time", 0)
+            - metrics.get("generation_time", 0),
+            0
+        )
+
+    return 0
@@ -0,0 +1,143 @@
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+MB = 1024 * 1024
+
+# Pipeline stages with memory accounting, in execution order
+MEMORY_STAGES = (
+    "pdf_load",
+    "chunking",
+    "embedding",
+    "index_load",
+    "retrieval",
+    "generation"
+)
+
+# tracemalloc's tracing state and peak are process-wide, so one tracked
+# stage at a time owns them: another thread's reset_peak() or stop() must
+# not land inside it
+_tracking_lock = threading.Lock()
+
+
+# --------------------------------------------
+# RESIDENT SET SIZE
+# --------------------------------------------
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, or None where it cannot
+    be read (no /proc and no psutil).
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+# --------------------------------------------
+# STAGE TRACKING
+# --------------------------------------------
+
+@contextmanager
+def track_stage(report, stage):
+    """
+    Record the memory cost of the enclosed block in report[stage]:
+
+        peak_mb      : tracemalloc peak above the allocation level at
+                       entry (Python and NumPy allocations)
+        rss_delta_mb : resident set growth, which also covers native
+                       allocations such as model weights
+
+    report=None disables tracking, so callers can pass their opt-in
+    state straight through. Only one stage is tracked at a time: a stage
+    that starts while another thread's tracked stage runs is not waited
+    for but recorded as {"peak_mb": None, "rss_delta_mb": None,
+    "skipped": True}. Untracked work in other threads is still included
+    in the peak.
+    """
+
+    if report is None:
+        yield
+        return
+
+    if not _tracking_lock.acquire(blocking=False):
+        report[stage] = {"peak_mb": None, "rss_delta_mb": None, "skipped": True}
+        yield
+        return
+
+    # Held for the whole stage to mark tracemalloc as owned; nothing ever
+    # waits on it
+    try:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        rss_before = current_rss()
+
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            rss_after = current_rss()
+
+            if started:
+                tracemalloc.stop()
+
+            report[stage] = {
+                "peak_mb": round((peak - base) / MB, 2),
+                "rss_delta_mb": (
+                    round((rss_after - rss_before) / MB, 2)
+                    if rss_before is not None and rss_after is not None else None
+                )
+            }
+    finally:
+        _tracking_lock.release()
+
+
+def peak_footprint_mb(memory):
+    """
+    Rough peak memory of one run from its per-stage report: the largest
+    stage peak or the accumulated RSS growth, whichever is larger.
+    """
+
+    if not memory:
+        return 0.0
+
+    # Skipped stages (see track_stage) have no measurements
+    peak = max((m["peak_mb"] or 0 for m in memory.values()), default=0.0)
+    growth = sum(max(m["rss_delta_mb"] or 0, 0) for m in memory.values())
+
+    return max(peak, growth)
+
+
+def available_memory_mb():
+    """
+    Memory available for new work (MemAvailable), or None if unknown.
+    """
+
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import psutil
+        return psutil.virtual_memory().available / MB
+    except ImportError:
+        return None
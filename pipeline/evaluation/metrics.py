@@ -10,6 +10,7 @@ def compute_metrics(retrieved_chunks, output, latency_data):
         "avg_chunk_length": round(avg_chunk_length, 2),
         "output_length": len(output),
         "embedding_time": latency_data.get("embedding_time", 0),
+        "retrieval_time": latency_data.get("retrieval_time", 0),
         "generation_time": latency_data.get("generation_time", 0),
         "total_latency": round(sum(latency_data.values()), 4)
     }
@@ -0,0 +1,55 @@
+import hashlib
+
+
+# Result fields that can be rebuilt from the index (see hydrate_result)
+HYDRATABLE_FIELDS = ("retrieved_chunks", "filtered_context")
+
+
+# --------------------------------------------
+# IDS
+# --------------------------------------------
+
+def text_id(text):
+    """
+    Stable 64-bit id of a chunk or sentence, derived from its content so
+    ids agree across configs, runs and sessions.
+    """
+
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def text_ids(texts):
+    return [text_id(t) for t in texts]
+
+
+def id_overlap(a, b):
+    """
+    Jaccard overlap of two id lists.
+    """
+
+    a, b = set(a), set(b)
+
+    if not a and not b:
+        return 1.0
+
+    return round(len(a & b) / len(a | b), 3)
+
+
+# --------------------------------------------
+# COMPACT RECORDS
+# --------------------------------------------
+
+def compact_result(result):
+    """
+    The result without text that the index already holds. Only results
+    with an index_ref can be hydrated again, so others are kept whole.
+    """
+
+    if not result.get("index_ref"):
+        return result
+
+    return {k: v for k, v in result.items() if k not in HYDRATABLE_FIELDS}
+
+
+def is_hydrated(result):
+    return all(field in result for field in HYDRATABLE_FIELDS)
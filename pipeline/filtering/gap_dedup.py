@@ -0,0 +1,161 @@
+import numpy as np
+
+from pipeline.generation.context_builder import embed_sentences
+
+
+# Gap sentences at least this similar (cosine) end up in one cluster
+GAP_DEDUP_THRESHOLD = 0.9
+
+# Rows compared per block in the similarity pass
+BLOCK_SIZE = 1024
+
+
+# --------------------------------------------
+# UNION-FIND
+# --------------------------------------------
+
+def _find(parent, i):
+
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+
+    # Path compression
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+
+    return root
+
+
+def _union(parent, a, b):
+
+    a, b = _find(parent, a), _find(parent, b)
+
+    if a != b:
+        # Lower index as root, so clusters are ordered by first occurrence
+        parent[max(a, b)] = min(a, b)
+
+
+# --------------------------------------------
+# CLUSTERING
+# --------------------------------------------
+
+def near_duplicate_pairs(vectors, threshold=GAP_DEDUP_THRESHOLD, block_size=BLOCK_SIZE):
+    """
+    (i, j) pairs with i < j whose cosine similarity is >= threshold.
+    Similarities are computed one block of rows at a time, so memory is
+    block_size x n rather than n x n.
+    """
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors = (vectors / norms).astype(np.float32)
+
+    pairs = []
+
+    for start in range(0, len(vectors), block_size):
+
+        # Only columns to the right of each row: every pair once
+        block = vectors[start:start + block_size] @ vectors[start:].T
+        rows, cols = np.nonzero(np.triu(block >= threshold, k=1))
+
+        pairs.extend(zip((rows + start).tolist(), (cols + start).tolist()))
+
+    return pairs
+
+
+def cluster_sentences(sentences, threshold=GAP_DEDUP_THRESHOLD, embedding_model="local"):
+    """
+    Group semantically near-identical sentences: connected components of
+    the "similarity >= threshold" graph (single linkage), found with
+    union-find. Sentence vectors come from the shared sentence cache.
+
+    Returns
+    -------
+    clusters : list[list[int]]
+        Sentence positions per cluster, clusters in order of their first
+        sentence.
+    vectors : np.ndarray
+    """
+
+    if not sentences:
+        return [], np.zeros((0, 0), dtype=np.float32)
+
+    vectors = np.asarray(embed_sentences(sentences, embedding_model), dtype=np.float32)
+
+    parent = list(range(len(sentences)))
+
+    for i, j in near_duplicate_pairs(vectors, threshold):
+        _union(parent, i, j)
+
+    clusters = {}
+    for i in range(len(sentences)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+
+    return list(clusters.values()), vectors
+
+
+def _representative(members, vectors):
+    """
+    The member closest to the cluster centroid.
+    """
+
+    if len(members) == 1:
+        return members[0]
+
+    member_vectors = vectors[members]
+    centroid = member_vectors.mean(axis=0)
+
+    return members[int(np.argmax(member_vectors @ centroid))]
+
+
+def dedup_gap_sentences(sentences, threshold=GAP_DEDUP_THRESHOLD, embedding_model="local"):
+    """
+    One representative sentence per cluster of near-duplicate gap
+    sentences, in the order the clusters first appear.
+
+    Returns
+    -------
+    distinct : list[str]
+    report : dict
+        raw_gap_count, gap_cluster_count and redundancy_ratio (share of
+        raw sentences that were redundant).
+    """
+
+    sentences = [s for s in sentences if s]
+
+    clusters, vectors = cluster_sentences(sentences, threshold, embedding_model)
+    distinct = [sentences[_representative(c, vectors)] for c in clusters]
+
+    raw = len(sentences)
+
+    return distinct, {
+        "raw_gap_count": raw,
+        "gap_cluster_count": len(clusters),
+        "redundancy_ratio": round(1 - len(clusters) / raw, 3) if raw else 0.0
+    }
+
+
+# --------------------------------------------
+# DIVERSITY
+# --------------------------------------------
+
+def gap_diversity(sentences, embedding_model="local"):
+    """
+    1 - mean pairwise cosine similarity of the gap sentences, from the
+    shared sentence cache. 0.5 (neutral) for fewer than two sentences.
+    """
+
+    if len(sentences) < 2:
+        return 0.5
+
+    vectors = np.asarray(embed_sentences(sentences, embedding_model), dtype=np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors = vectors / norms
+
+    # Mean of the strict upper triangle
+    upper = (vectors @ vectors.T)[np.triu_indices(len(vectors), k=1)]
+
+    return round(float(1 - upper.mean()), 4)
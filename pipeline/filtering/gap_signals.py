@@ -0,0 +1,25 @@
+import re
+
+
+GAP_KEYWORDS = [
+    "limitation", "future", "lack", "gap",
+    "uncertain", "not fully effective"
+]
+
+
+def split_sentences(chunk):
+    return re.split(r'(?<=[.!?])\s+', chunk)
+
+
+def tag_gap_sentences(chunk):
+    """
+    Return the gap-signal sentences of a single chunk, in order.
+    """
+
+    tagged = []
+
+    for s in split_sentences(chunk):
+        if any(k in s.lower() for k in GAP_KEYWORDS):
+            tagged.append(s.strip())
+
+    return tagged
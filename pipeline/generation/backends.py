@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+
+GENERATION_MODEL = "phi3:mini"
+
+# Endpoints, overridable per machine (OLLAMA_HOST as the ollama CLI reads it)
+OLLAMA_URL = os.environ.get("OLLAMA_HOST", "127.0.0.1:11434")
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "http://127.0.0.1:8000/v1")
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+
+# Seconds. Connecting and the liveness probe fail fast, so "auto" falls
+# back quickly when no server (or a hung one) is there; reads wait for
+# generations, which can take minutes on CPU
+CONNECT_TIMEOUT = float(os.environ.get("GENERATION_CONNECT_TIMEOUT", 2))
+PROBE_TIMEOUT = float(os.environ.get("GENERATION_PROBE_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("GENERATION_READ_TIMEOUT", 300))
+
+# Errors meaning "no usable server", as opposed to a bad request
+UNAVAILABLE_ERRORS = (OSError, http.client.HTTPException)
+
+
+class BackendError(Exception):
+    pass
+
+
+# --------------------------------------------
+# CONNECTION POOL
+# --------------------------------------------
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections to one server, reused across requests
+    and threads. Records how much time goes into opening connections.
+    size=0 opens a new connection per request (for comparison).
+
+    Connections are opened within connect_timeout; each request then
+    waits up to read_timeout (or its own timeout) for the response.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        size=4,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT
+    ):
+        if "://" not in base_url:
+            base_url = "http://" + base_url
+        parts = urlsplit(base_url)
+
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._stats_lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+        self.connect_time = 0.0
+
+    def _connect(self):
+
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=self.connect_timeout)
+
+        start = time.perf_counter()
+        conn.connect()
+        elapsed = time.perf_counter() - start
+
+        # http.client writes headers and body separately; without this a
+        # reused connection waits on delayed ACKs (~40 ms per request)
+        if conn.sock is not None and self.scheme != "https":
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        with self._stats_lock:
+            self.opened += 1
+            self.connect_time += elapsed
+
+        return conn, elapsed
+
+    def request(self, method, path, payload=None, headers=None, timeout=None):
+        """
+        Returns (status, parsed JSON body, seconds spent connecting).
+        A pooled connection the server has since closed is replaced once.
+        timeout overrides read_timeout for this request.
+        """
+
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = dict({"Content-Type": "application/json"}, **(headers or {}))
+
+        for attempt in range(2):
+
+            try:
+                conn, connect_time = self._idle.get_nowait(), 0.0
+            except queue.Empty:
+                conn, connect_time = self._connect()
+
+            try:
+                if conn.sock is not None:
+                    conn.sock.settimeout(self.read_timeout if timeout is None else timeout)
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if attempt == 0 and connect_time == 0.0:
+                    continue  # stale keep-alive connection
+                raise
+            except BaseException:
+                # e.g. a read timeout: the connection is mid-response
+                conn.close()
+                raise
+
+            if response.will_close or self._idle.qsize() >= self.size:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+            with self._stats_lock:
+                self.requests += 1
+
+            return response.status, json.loads(data or b"{}"), connect_time
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.opened,
+                "connection_time": round(self.connect_time, 4),
+                "mean_connection_overhead": (
+                    round(self.connect_time / self.requests, 6) if self.requests else 0.0
+                )
+            }
+
+
+# --------------------------------------------
+# BACKENDS
+# --------------------------------------------
+
+class HTTPBackend:
+    """
+    Shared warm-up bookkeeping. Subclasses implement _chat, _warm_up and
+    _probe (a cheap request that needs no model).
+    """
+
+    name = None
+
+    def __init__(self, base_url, model):
+        self.model = model
+        self.pool = ConnectionPool(base_url)
+        self.cold_start = None
+        self._warm_lock = threading.Lock()
+
+    def warm_up(self):
+        """
+        Make the server load the model now instead of inside the first
+        real request. Returns the seconds it took (the cold start).
+        """
+
+        with self._warm_lock:
+            if self.cold_start is None:
+                start = time.perf_counter()
+                self._warm_up()
+                self.cold_start = time.perf_counter() - start
+
+        return self.cold_start
+
+    def probe(self):
+        """
+        Whether the server answers within PROBE_TIMEOUT.
+        """
+
+        try:
+            status, _, _ = self._probe()
+        except UNAVAILABLE_ERRORS:
+            return False
+
+        return status == 200
+
+    def generate(self, messages, temperature):
+
+        status, body, connect_time = self._chat(messages, temperature)
+
+        if status != 200:
+            raise BackendError(f"{self.name} returned {status}: {body}")
+
+        return self._content(body), {
+            "backend": self.name,
+            "model": self.model,
+            "connect_time": round(connect_time, 6),
+            "cold_start": self.cold_start
+        }
+
+    def stats(self):
+        return dict(self.pool.stats(), backend=self.name, cold_start=self.cold_start)
+
+
+class OllamaBackend(HTTPBackend):
+
+    name = "ollama"
+
+    def __init__(self, base_url=OLLAMA_URL, model=None, keep_alive=OLLAMA_KEEP_ALIVE):
+        super().__init__(base_url, model or GENERATION_MODEL)
+        self.keep_alive = keep_alive
+
+    def _warm_up(self):
+        # An empty prompt loads the model without generating
+        status, body, _ = self.pool.request("POST", "/api/generate", {
+            "model": self.model,
+            "prompt": "",
+            "keep_alive": self.keep_alive
+        })
+        if status != 200:
+            raise BackendError(f"ollama warm-up returned {status}: {body}")
+
+    def _probe(self):
+        return self.pool.request("GET", "/api/version", timeout=PROBE_TIMEOUT)
+
+    def _chat(self, messages, temperature):
+        return self.pool.request("POST", "/api/chat", {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": temperature}
+        })
+
+    @staticmethod
+    def _content(body):
+        return body["message"]["content"]
+
+
+class OpenAICompatibleBackend(HTTPBackend):
+    """
+    Any server with the /v1/chat/completions API (llama.cpp server, vLLM,
+    LM Studio, ...).
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url=OPENAI_BASE_URL, model=None, api_key=OPENAI_API_KEY):
+        super().__init__(base_url, model or GENERATION_MODEL)
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _warm_up(self):
+        status, body, _ = self.pool.request("POST", "/chat/completions", {
+            "model": self.model,
+            "messages": [{"role": "user", "content": "ok"}],
+            "max_tokens": 1
+        }, self.headers)
+        if status != 200:
+            raise BackendError(f"openai warm-up returned {status}: {body}")
+
+    def _probe(self):
+        return self.pool.request("GET", "/models", None, self.headers, timeout=PROBE_TIMEOUT)
+
+    def _chat(self, messages, temperature):
+        return self.pool.request("POST", "/chat/completions", {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature
+        }, self.headers)
+
+    @staticmethod
+    def _content(body):
+        return body["choices"][0]["message"]["content"]
+
+
+# --------------------------------------------
+# REGISTRY
+# --------------------------------------------
+
+BACKEND_CLASSES = {
+    "ollama": OllamaBackend,
+    "openai": OpenAICompatibleBackend
+}
+
+_backends = {}
+_registry_lock = threading.Lock()
+
+
+def get_backend(name):
+    """
+    Process-wide backend instance, so connections and warm-up state are
+    shared by every generation call.
+    """
+
+    with _registry_lock:
+        if name not in _backends:
+            _backends[name] = BACKEND_CLASSES[name]()
+        return _backends[name]
+
+
+def warm_up(name="ollama"):
+    """
+    Warm a backend at startup. Returns the cold-start seconds, or None
+    if the server is not reachable or does not answer the probe.
+    """
+
+    backend = get_backend(name)
+
+    if not backend.probe():
+        return None
+
+    try:
+        return backend.warm_up()
+    except UNAVAILABLE_ERRORS + (BackendError,):
+        return None
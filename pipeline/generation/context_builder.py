@@ -0,0 +1,158 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from pipeline.chunking.adaptive_chunker import estimate_tokens
+from pipeline.embedding.local_embedding import embed_local
+
+
+# Tokenizer of the generation model (phi3:mini)
+TOKENIZER_NAME = "microsoft/Phi-3-mini-4k-instruct"
+
+# Sentences at least this similar to an already selected one are dropped
+DEDUP_THRESHOLD = 0.92
+
+
+# --------------------------------------------
+# TOKEN COUNTING
+# --------------------------------------------
+
+_tokenizer = None
+
+
+def get_tokenizer():
+    """
+    The target model's tokenizer if transformers can load it, otherwise
+    False (callers fall back to the word-count heuristic).
+    """
+
+    global _tokenizer
+
+    if _tokenizer is None:
+        try:
+            from transformers import AutoTokenizer
+            _tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+        except Exception:
+            _tokenizer = False
+
+    return _tokenizer
+
+
+@lru_cache(maxsize=65536)
+def count_tokens(sentence):
+
+    tokenizer = get_tokenizer()
+
+    if tokenizer:
+        return len(tokenizer.encode(sentence, add_special_tokens=False))
+
+    return estimate_tokens(sentence)
+
+
+# --------------------------------------------
+# SENTENCE EMBEDDINGS
+# --------------------------------------------
+
+# Sentence vectors kept in memory (LRU), like count_tokens' cache
+SENTENCE_CACHE_SIZE = 65536
+
+# (embedding_model, sentence) -> vector
+_sentence_vectors = OrderedDict()
+_sentence_lock = threading.Lock()
+
+
+def embed_sentences(sentences, embedding_model="local"):
+    """
+    Embeddings for sentences, computing only ones not recently seen in
+    this process (overlapping chunks repeat the same sentences).
+    """
+
+    found = {}
+
+    with _sentence_lock:
+        for s in dict.fromkeys(sentences):
+            vector = _sentence_vectors.get((embedding_model, s))
+            if vector is not None:
+                _sentence_vectors.move_to_end((embedding_model, s))
+                found[s] = vector
+
+    missing = [s for s in dict.fromkeys(sentences) if s not in found]
+
+    if missing:
+        computed = dict(zip(missing, embed_local(missing, embedding_model)))
+        found.update(computed)
+
+        with _sentence_lock:
+            for s, v in computed.items():
+                _sentence_vectors[embedding_model, s] = v
+                _sentence_vectors.move_to_end((embedding_model, s))
+
+            while len(_sentence_vectors) > SENTENCE_CACHE_SIZE:
+                _sentence_vectors.popitem(last=False)
+
+    return np.array([found[s] for s in sentences])
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+# --------------------------------------------
+# COMPRESSION
+# --------------------------------------------
+
+def compress_context(
+    sentences,
+    query,
+    token_budget,
+    dedup_threshold=DEDUP_THRESHOLD,
+    embedding_model="local"
+):
+    """
+    Pick the most query-relevant, mutually distinct sentences that fit in
+    token_budget tokens. Selected sentences keep their original order.
+    """
+
+    sentences = list(dict.fromkeys(s for s in sentences if s))
+
+    if not sentences:
+        return []
+
+    vectors = _normalize_rows(embed_sentences(sentences, embedding_model))
+    query_vector = _normalize_rows(embed_sentences([query], embedding_model))[0]
+
+    relevance = vectors @ query_vector
+    order = np.argsort(-relevance)
+
+    selected = []
+    used = 0
+
+    for idx in order:
+
+        tokens = count_tokens(sentences[idx])
+
+        if used + tokens > token_budget:
+            continue
+
+        if selected and float(np.max(vectors[selected] @ vectors[idx])) >= dedup_threshold:
+            continue
+
+        selected.append(int(idx))
+        used += tokens
+
+    return [sentences[i] for i in sorted(selected)]
+
+
+def context_tokens(sentences, exact=True):
+    """
+    Token count of the sentences. exact=False uses the word-count
+    heuristic and never loads the tokenizer (transformers plus a hub
+    download on first use).
+    """
+
+    count = count_tokens if exact else estimate_tokens
+    return sum(count(s) for s in sentences)
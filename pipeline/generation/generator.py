@@ -1,45 +1,69 @@
-# --------------------------------------------
-# OPTIONAL OLLAMA IMPORT
-# --------------------------------------------
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+import time
+
+from pipeline.generation.prompt_modes import build_messages
+from pipeline.generation.backends import BackendError, get_backend
+
+
+# "auto" uses Ollama when its server answers, "ollama" / "openai" fail
+# loudly instead, "fallback" never calls an LLM (offline runs, load tests)
+GENERATION_BACKENDS = ("auto", "ollama", "openai", "fallback")
 
 
 # --------------------------------------------
 # MAIN GENERATION FUNCTION
 # --------------------------------------------
 
-def generate_answer(context, query, mode="conservative"):
+def generate_answer(query, context, temperature=0.2, mode="conservative", backend="auto"):
     """
     Generates answer using:
-    - Ollama (local)
-    - Fallback (cloud-safe)
+    - Ollama or an OpenAI-compatible server (local, pooled connections)
+    - Fallback (cloud-safe, or forced with backend="fallback")
+
+    Returns
+    -------
+    output : str
+    generation_time : float
+    info : dict
+        Backend used, connection overhead and the backend's cold start.
     """
 
+    start = time.time()
+
+    if backend not in GENERATION_BACKENDS:
+        raise ValueError(f"Invalid generation backend: {backend}")
+
+    if isinstance(context, str):
+        context = [context]
+
     # -----------------------------
-    # LOCAL (OLLAMA)
+    # LOCAL SERVER
     # -----------------------------
-    if OLLAMA_AVAILABLE:
+    if backend != "fallback":
         try:
-            response = ollama.chat(
-                model="phi3:mini",
-                messages=[
-                    {"role": "system", "content": "You are a precise research assistant."},
-                    {"role": "user", "content": f"Context:\n{context}\n\nQuestion:\n{query}"}
-                ]
+            server = get_backend("ollama" if backend == "auto" else backend)
+
+            # A server that accepts connections but hangs would hold an
+            # "auto" run for the whole read timeout
+            if backend == "auto" and not server.probe():
+                raise BackendError("ollama did not answer the probe")
+
+            output, info = server.generate(
+                build_messages(query, context, mode),
+                temperature
             )
-            return response["message"]["content"]
+            return output, time.time() - start, info
 
         except Exception:
-            pass  # fallback if ollama fails
+            if backend != "auto":
+                raise
+            # fallback if ollama fails
 
     # -----------------------------
     # FALLBACK (DEPLOYMENT SAFE)
     # -----------------------------
-    return fallback_generate(context, query, mode)
+    output = fallback_generate("\n".join(context), query, mode)
+
+    return output, time.time() - start, {"backend": "fallback"}
 
 
 # --------------------------------------------
@@ -1,15 +1,20 @@
+# Static part of every prompt. Kept byte-identical between calls (no
+# timestamps, no per-call whitespace) so servers that cache prompt
+# prefixes can reuse it; per-call content goes last.
+SYSTEM_PROMPT = "You are a precise research assistant."
+
+MODE_INSTRUCTIONS = {
+    "conservative": "Answer strictly based on provided context.",
+    "creative": "Provide analytical and exploratory research gaps.",
+    "structured": "Provide research gaps in structured bullet format."
+}
+
+
 def build_prompt(query, context_chunks, mode):
 
     context = "\n\n".join(context_chunks)
 
-    if mode == "conservative":
-        instruction = "Answer strictly based on provided context."
-    elif mode == "creative":
-        instruction = "Provide analytical and exploratory research gaps."
-    elif mode == "structured":
-        instruction = "Provide research gaps in structured bullet format."
-    else:
-        instruction = ""
+    instruction = MODE_INSTRUCTIONS.get(mode, "")
 
     return f"""
     {instruction}
@@ -20,3 +25,21 @@ def build_prompt(query, context_chunks, mode):
     Question:
     {query}
     """
+
+
+def build_messages(query, context_chunks, mode):
+    """
+    Chat messages with the static prefix (system prompt + mode
+    instruction) first and the context and question after it.
+    """
+
+    system = SYSTEM_PROMPT
+    if mode in MODE_INSTRUCTIONS:
+        system += "\n" + MODE_INSTRUCTIONS[mode]
+
+    context = "\n\n".join(context_chunks)
+
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion:\n{query}"}
+    ]
@@ -0,0 +1,175 @@
+import os
+
+from utils.pdf_loader import load_pdf
+
+from pipeline.chunking.chunker import chunk_for_config
+from pipeline.embedding.embedder import embed_chunks
+from pipeline.retrieval.bm25 import build_bm25_postings
+from pipeline.filtering.gap_signals import tag_gap_sentences
+
+
+# ---------------------------------------------------
+# SHARD BUILDING
+# ---------------------------------------------------
+
+def list_corpus_documents(corpus_dir):
+    """
+    PDF files under corpus_dir, as sorted paths relative to it.
+    """
+
+    documents = []
+
+    for root, _, files in os.walk(corpus_dir):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                full = os.path.join(root, name)
+                documents.append(os.path.relpath(full, corpus_dir))
+
+    return sorted(documents)
+
+
+def build_shard(doc_id, document_path, config):
+    """
+    Index a single document: chunk text, chunk vectors, BM25 postings
+    and per-chunk gap tags.
+    """
+
+    text = load_pdf(document_path)
+    chunks = chunk_for_config(text, config)
+
+    vectors, embed_time = embed_chunks(chunks, config.embedding_model)
+    postings, doc_lengths = build_bm25_postings(chunks)
+
+    return {
+        "doc_id": doc_id,
+        "path": document_path,
+        "chunks": chunks,
+        "vectors": vectors,
+        "postings": postings,
+        "doc_lengths": doc_lengths,
+        "gap_tags": [tag_gap_sentences(c) for c in chunks],
+        "embedding_time": embed_time
+    }
+
+
+# ---------------------------------------------------
+# CORPUS ASSEMBLY
+# ---------------------------------------------------
+
+def empty_corpus():
+    return {
+        "shards": [],
+        "chunk_map": [],
+        "bm25_stats": {
+            "total_docs": 0,
+            "total_length": 0,
+            "avg_doc_length": 0,
+            "doc_freqs": {}
+        },
+        "embedding_time": 0
+    }
+
+
+def relink_corpus(corpus):
+    """
+    Reassign global chunk ids after shards were added or removed.
+
+    chunk_map[g] == (doc_id, offset) for global chunk id g, and each shard
+    gets a "base" so that g == shard["base"] + offset.
+    """
+
+    chunk_map = []
+
+    for shard in corpus["shards"]:
+        shard["base"] = len(chunk_map)
+        chunk_map.extend((shard["doc_id"], offset) for offset in range(len(shard["chunks"])))
+
+    stats = corpus["bm25_stats"]
+    stats["total_docs"] = len(chunk_map)
+    stats["avg_doc_length"] = (
+        stats["total_length"] / stats["total_docs"] if stats["total_docs"] else 0
+    )
+
+    corpus["chunk_map"] = chunk_map
+
+
+def add_shard(corpus, shard, relink=True):
+    """
+    Add a shard in place, updating corpus-wide BM25 statistics.
+    """
+
+    doc_freqs = corpus["bm25_stats"]["doc_freqs"]
+
+    for term, entries in shard["postings"].items():
+        doc_freqs[term] = doc_freqs.get(term, 0) + len(entries)
+
+    corpus["bm25_stats"]["total_length"] += sum(shard["doc_lengths"])
+    corpus["shards"].append(shard)
+
+    if relink:
+        relink_corpus(corpus)
+
+
+def remove_shard(corpus, doc_id, relink=True):
+    """
+    Remove a document's shard in place. Returns the removed shard or None.
+    """
+
+    for i, shard in enumerate(corpus["shards"]):
+        if shard["doc_id"] == doc_id:
+            break
+    else:
+        return None
+
+    corpus["shards"].pop(i)
+    doc_freqs = corpus["bm25_stats"]["doc_freqs"]
+
+    for term, entries in shard["postings"].items():
+        remaining = doc_freqs.get(term, 0) - len(entries)
+        if remaining > 0:
+            doc_freqs[term] = remaining
+        else:
+            doc_freqs.pop(term, None)
+
+    corpus["bm25_stats"]["total_length"] -= sum(shard["doc_lengths"])
+
+    if relink:
+        relink_corpus(corpus)
+
+    return shard
+
+
+def assemble_corpus(shards):
+    """
+    Link shards into a corpus: assign global chunk ids and compute the
+    corpus-wide BM25 statistics.
+    """
+
+    corpus = empty_corpus()
+
+    for shard in shards:
+        add_shard(corpus, shard, relink=False)
+
+    relink_corpus(corpus)
+    corpus["embedding_time"] = sum(s["embedding_time"] for s in shards)
+
+    return corpus
+
+
+def build_corpus_index(corpus_dir, config, progress_callback=None):
+    """
+    Build one shard per PDF in corpus_dir and assemble them.
+    """
+
+    documents = list_corpus_documents(corpus_dir)
+    shards = []
+
+    for i, doc_id in enumerate(documents):
+        shards.append(
+            build_shard(doc_id, os.path.join(corpus_dir, doc_id), config)
+        )
+
+        if progress_callback:
+            progress_callback(i + 1, len(documents))
+
+    return assemble_corpus(shards)
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import hashlib
+
+from utils.cache_manager import CacheManager, atomic_write_bytes, file_fingerprint
+from pipeline.embedding.quantization import quantize_vectors, save_full_precision
+from pipeline.indexing.corpus import (
+    list_corpus_documents,
+    build_shard,
+    empty_corpus,
+    add_shard,
+    remove_shard,
+    relink_corpus
+)
+
+
+INDEX_ROOT = os.path.join("cache", "corpus")
+MANIFEST_NAME = "manifest.json"
+
+
+# ---------------------------------------------------
+# MANIFEST
+# ---------------------------------------------------
+
+def index_params(config):
+    """
+    Everything that changes shard contents. A different value for any of
+    these invalidates every shard.
+    """
+
+    params = {
+        "chunk_size": config.chunk_size,
+        "chunk_overlap": config.chunk_overlap,
+        "chunking_mode": config.chunking_mode,
+        "embedding_model": config.embedding_model,
+        "vector_storage": config.vector_storage
+    }
+
+    # Only recorded when off, so existing manifests stay valid
+    if config.vector_storage != "float32" and not config.full_precision_rescore:
+        params["full_precision_rescore"] = False
+
+    return params
+
+
+def default_index_dir(corpus_dir):
+    key = hashlib.md5(os.path.abspath(corpus_dir).encode()).hexdigest()
+    return os.path.join(INDEX_ROOT, key)
+
+
+def load_manifest(index_dir):
+    path = os.path.join(index_dir, MANIFEST_NAME)
+
+    if not os.path.exists(path):
+        return {"params": None, "documents": {}}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(index_dir, manifest):
+    atomic_write_bytes(
+        os.path.join(index_dir, MANIFEST_NAME),
+        json.dumps(manifest, indent=2).encode()
+    )
+
+
+# ---------------------------------------------------
+# CHANGE DETECTION
+# ---------------------------------------------------
+
+def detect_changes(corpus_dir, manifest, params):
+    """
+    Compare the folder against the manifest.
+
+    Files whose size and mtime match the manifest are trusted without
+    hashing; everything else is hashed so touched-but-identical files are
+    not re-indexed.
+
+    Returns
+    -------
+    changes : dict
+        "added", "removed", "modified", "unchanged" (lists of doc ids) and
+        "entries" (fresh manifest entries for every current document).
+    """
+
+    known = manifest["documents"] if manifest["params"] == params else {}
+
+    changes = {"added": [], "removed": [], "modified": [], "unchanged": [], "entries": {}}
+
+    current = list_corpus_documents(corpus_dir)
+
+    for doc_id in current:
+        stat = os.stat(os.path.join(corpus_dir, doc_id))
+        old = known.get(doc_id)
+
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            changes["unchanged"].append(doc_id)
+            changes["entries"][doc_id] = old
+            continue
+
+        sha = file_fingerprint(os.path.join(corpus_dir, doc_id))
+
+        changes["entries"][doc_id] = {
+            "sha256": sha,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime
+        }
+
+        if old is None:
+            changes["added"].append(doc_id)
+        elif old["sha256"] == sha:
+            changes["unchanged"].append(doc_id)
+        else:
+            changes["modified"].append(doc_id)
+
+    changes["removed"] = sorted(
+        set(manifest["documents"]) - set(current)
+    )
+
+    return changes
+
+
+# ---------------------------------------------------
+# INCREMENTAL UPDATE
+# ---------------------------------------------------
+
+def _load_shard(store, doc_id, entry):
+    """
+    Stored shard for a manifest entry, or None if it was evicted or
+    failed its integrity check.
+    """
+
+    shard = store.get(entry["sha256"])
+
+    if shard is not None:
+        # Content-addressed: the same file may have been renamed or moved
+        shard["doc_id"] = doc_id
+
+    return shard
+
+
+def _remove_shard_files(store, sha):
+    store.delete(sha)
+    store.delete(sha, ".f32.npy")
+
+
+def _compress_shard(store, shard, sha, storage, full_precision_rescore=True):
+    """
+    Keep only the compressed matrix in the shard; float32 originals go to
+    a memory-mappable file for shortlist re-scoring unless
+    full_precision_rescore is off.
+    """
+
+    if storage == "float32":
+        return
+
+    full_path = None
+
+    if full_precision_rescore:
+        full_path = store.path(sha, ".f32.npy")
+        save_full_precision(shard["vectors"], full_path)
+
+    shard["vectors"] = quantize_vectors(shard["vectors"], storage, full_path)
+
+
+def update_corpus_index(corpus_dir, config, corpus=None, index_dir=None, progress_callback=None):
+    """
+    Bring a persisted corpus index up to date with corpus_dir.
+
+    Only added or modified PDFs are extracted, chunked and embedded.
+    Shards are stored per document content hash next to a manifest of
+    hashes, mtimes and chunking params. Pass the in-memory corpus from a
+    previous call to patch its shards and BM25 statistics in place
+    instead of reloading unchanged shards from disk.
+
+    The returned corpus carries an "update" report.
+    """
+
+    start = time.time()
+
+    index_dir = index_dir or default_index_dir(corpus_dir)
+    store = CacheManager(index_dir)
+
+    params = index_params(config)
+    manifest = load_manifest(index_dir)
+    changes = detect_changes(corpus_dir, manifest, params)
+
+    if manifest["params"] != params:
+        # Chunking or embedding changed: every stored shard is stale
+        for old in manifest["documents"].values():
+            _remove_shard_files(store, old["sha256"])
+        manifest["documents"] = {}
+        corpus = None
+
+    missing = []
+
+    if corpus is None:
+        corpus = empty_corpus()
+
+        for doc_id in changes["unchanged"]:
+            shard = _load_shard(store, doc_id, changes["entries"][doc_id])
+
+            if shard is None:
+                missing.append(doc_id)
+            else:
+                add_shard(corpus, shard, relink=False)
+
+    for doc_id in changes["removed"] + changes["modified"]:
+        remove_shard(corpus, doc_id, relink=False)
+
+    to_build = changes["added"] + changes["modified"] + missing
+    embed_time = 0
+
+    for i, doc_id in enumerate(to_build):
+        sha = changes["entries"][doc_id]["sha256"]
+
+        def build():
+            shard = build_shard(doc_id, os.path.join(corpus_dir, doc_id), config)
+            _compress_shard(
+                store, shard, sha, config.vector_storage, config.full_precision_rescore
+            )
+            return shard
+
+        # A hit means identical content is already indexed (renamed or
+        # duplicated file, or another indexer got there first)
+        shard, hit = store.get_or_compute(sha, build)
+        shard["doc_id"] = doc_id
+
+        if not hit:
+            embed_time += shard["embedding_time"]
+
+        add_shard(corpus, shard, relink=False)
+
+        if progress_callback:
+            progress_callback(i + 1, len(to_build))
+
+    corpus["shards"].sort(key=lambda s: s["doc_id"])
+    relink_corpus(corpus)
+
+    # Drop shard files no longer referenced by any document
+    live = {e["sha256"] for e in changes["entries"].values()}
+    for old in manifest["documents"].values():
+        if old["sha256"] not in live:
+            _remove_shard_files(store, old["sha256"])
+
+    save_manifest(index_dir, {"params": params, "documents": changes["entries"]})
+
+    corpus["embedding_time"] = embed_time
+    corpus["update"] = {
+        "added": changes["added"],
+        "removed": changes["removed"],
+        "modified": changes["modified"],
+        "rebuilt": missing,
+        "unchanged": len(changes["unchanged"]),
+        "elapsed": round(time.time() - start, 3)
+    }
+
+    return corpus
@@ -0,0 +1,103 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache_manager import file_fingerprint
+from pipeline.indexing.incremental import index_params
+
+
+# Finished indexes kept in memory for a later run to pick up
+MAX_PREFETCHED = 4
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+_futures = OrderedDict()
+_lock = threading.Lock()
+
+
+# ---------------------------------------------------
+# BACKGROUND INDEX BUILDS
+# ---------------------------------------------------
+
+def prefetch_key(config, document_path):
+    """
+    Document content plus every parameter that changes its index.
+    """
+
+    return (
+        file_fingerprint(document_path),
+        json.dumps(index_params(config), sort_keys=True)
+    )
+
+
+def _failed(future):
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+def submit_prefetch(key, build):
+    """
+    Start build() in the background unless the same index is already
+    building or built. A failed build is started again. Returns its
+    future.
+    """
+
+    with _lock:
+
+        future = _futures.get(key)
+
+        if future is not None and not _failed(future):
+            _futures.move_to_end(key)
+            return future
+
+        future = _executor.submit(build)
+        _futures[key] = future
+        _futures.move_to_end(key)
+
+        # Drop the oldest finished builds; running ones are never dropped
+        finished = [k for k, f in _futures.items() if f.done()]
+        for k in finished[:max(0, len(_futures) - MAX_PREFETCHED)]:
+            del _futures[k]
+
+        return future
+
+
+def cancel_stale_prefetches(keep):
+    """
+    Cancel builds of the keep futures' documents that are still queued
+    behind the workers for other index parameters (settings the user has
+    since changed), so the pool works on the current ones. Running
+    builds cannot be cancelled and finish normally.
+    """
+
+    keep = {id(f) for f in keep}
+
+    with _lock:
+
+        documents = {k[0] for k, f in _futures.items() if id(f) in keep}
+
+        stale = [
+            k for k, f in _futures.items()
+            if k[0] in documents and id(f) not in keep and f.cancel()
+        ]
+
+        for k in stale:
+            del _futures[k]
+
+        return len(stale)
+
+
+def prefetched(key):
+    """
+    Future of a background build of this index, or None. Failed builds
+    are forgotten so the index is built (or prefetched) again.
+    """
+
+    with _lock:
+
+        future = _futures.get(key)
+
+        if future is not None and _failed(future):
+            del _futures[key]
+            return None
+
+        return future
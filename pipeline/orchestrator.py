@@ -1,54 +1,135 @@
-import re
 import os
-import pickle
+import time
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
-from utils.pdf_loader import load_pdf
+import numpy as np
 
-from pipeline.chunking.chunker import fixed_chunk_document
-from pipeline.chunking.adaptive_chunker import adaptive_chunk_document
+from utils.pdf_loader import count_pdf_pages, iter_pdf_pages, load_pdf
+from utils.cache_manager import EMBEDDING_CACHE, TEXT_CACHE, file_fingerprint
+from utils.profiler import profile_call
+
+from pipeline.chunking.chunker import chunk_for_config, stream_fixed_chunks
 
 from pipeline.embedding.embedder import embed_chunks
+from pipeline.embedding.local_embedding import embed_local
+from pipeline.embedding.quantization import (
+    quantize_vectors,
+    save_full_precision,
+    store_nbytes
+)
+from pipeline.embedding.vector_file import VectorFileWriter
+from pipeline.indexing.incremental import update_corpus_index
+from pipeline.indexing.prefetch import prefetch_key, prefetched, submit_prefetch
 from pipeline.retrieval.retriever import retrieve
+from pipeline.retrieval.sharded import sharded_retrieve
 from pipeline.generation.generator import generate_answer
 from pipeline.evaluation.metrics import compute_metrics
+from pipeline.evaluation.memory import track_stage
+from pipeline.evaluation.records import id_overlap, is_hydrated, text_ids
+from pipeline.generation.context_builder import compress_context, context_tokens
+from pipeline.filtering.gap_signals import split_sentences, tag_gap_sentences
+from pipeline.filtering.gap_dedup import dedup_gap_sentences, gap_diversity
+
+
+# Config fields each stage depends on, in pipeline order (see
+# run_comparison). The index also depends on every field of its cache key
+# (_index_params, compared directly); track_memory is an index field
+# because the memory report travels with the index.
+STAGE_FIELDS = (
+    ("index", ("track_memory",)),
+    ("retrieval", (
+        "retrieval_mode", "top_k", "context_token_budget", "gap_dedup_threshold"
+    )),
+    ("generation", ("temperature", "prompt_mode", "generation_backend"))
+)
+
+# Documents with at least this many pages are indexed page by page
+STREAMING_MIN_PAGES = 200
+STREAMING_BATCH_SIZE = 64
 
 
 # ---------------------------------------------------
 # CACHE SETUP
 # ---------------------------------------------------
 
-CACHE_DIR = "cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+def _index_params(config):
+
+    params = (
+        f"_{config.chunk_size}_{config.chunk_overlap}"
+        f"_{config.chunking_mode}_{config.embedding_model}"
+        f"_{config.vector_storage}"
+    )
+
+    if config.vector_storage != "float32" and not config.full_precision_rescore:
+        params += "_approx"
+
+    return params.encode()
 
 
 def get_cache_key(text, config):
-    return hashlib.md5(
-        f"{len(text)}_{config.chunk_size}_{config.chunking_mode}".encode()
-    ).hexdigest()
+    """
+    Key on the full document content plus every parameter that changes
+    the chunks or their vectors.
+    """
+
+    digest = hashlib.md5(text.encode())
+    digest.update(_index_params(config))
+    return digest.hexdigest()
+
+
+def get_stream_cache_key(fingerprint, config):
+    """
+    Streamed indexes never assemble the full text, so they are keyed on
+    the file's content hash instead.
+    """
+
+    digest = hashlib.md5(f"stream_{fingerprint}".encode())
+    digest.update(_index_params(config))
+    return digest.hexdigest()
 
 
 # ---------------------------------------------------
 # GAP EXTRACTION
 # ---------------------------------------------------
 
-def extract_gap_sentences(chunks, max_sentences=12):
-
-    keywords = [
-        "limitation", "future", "lack", "gap",
-        "uncertain", "not fully effective"
-    ]
+def extract_gap_sentences(
+    chunks,
+    max_sentences=12,
+    dedup_threshold=None,
+    embedding_model="local"
+):
+    """
+    Gap-signal sentences of the chunks, in order. Returns (sentences,
+    dedup report or None); see select_gap_sentences.
+    """
 
     results = []
 
     for chunk in chunks:
-        sentences = re.split(r'(?<=[.!?])\s+', chunk)
+        results.extend(tag_gap_sentences(chunk))
+
+    return select_gap_sentences(results, max_sentences, dedup_threshold, embedding_model)
+
+
+def select_gap_sentences(
+    sentences,
+    max_sentences=12,
+    dedup_threshold=None,
+    embedding_model="local"
+):
+    """
+    Cap raw gap sentences at max_sentences. With dedup_threshold, near
+    duplicates (overlapping chunks repeat sentences) are first merged to
+    one sentence per cluster (see pipeline/filtering/gap_dedup.py).
+    """
+
+    report = None
 
-        for s in sentences:
-            if any(k in s.lower() for k in keywords):
-                results.append(s.strip())
+    if dedup_threshold is not None:
+        sentences, report = dedup_gap_sentences(sentences, dedup_threshold, embedding_model)
 
-    return results[:max_sentences]
+    return sentences[:max_sentences], report
 
 
 # ---------------------------------------------------
@@ -69,105 +150,702 @@ def cap_context_length(sentences, max_chars=2500):
     return selected
 
 
+def assemble_context(config, query, filtered, retrieved_chunks):
+    """
+    Context sentences for generation plus a token report.
+
+    Without a token budget this is the character cap over the gap
+    sentences (or the top chunks). With config.context_token_budget set,
+    near-duplicate sentences are dropped and the most query-relevant ones
+    are packed into the budget. Token counts use the generation model's
+    tokenizer only with a budget, and the word-count estimate otherwise.
+    """
+
+    if filtered:
+        candidates = filtered
+    elif config.context_token_budget:
+        candidates = [
+            s.strip() for c in retrieved_chunks[:3] for s in split_sentences(c)
+        ]
+    else:
+        candidates = retrieved_chunks[:3]
+
+    if config.context_token_budget:
+        context = compress_context(
+            candidates,
+            query,
+            config.context_token_budget,
+            embedding_model=config.embedding_model
+        )
+    else:
+        context = cap_context_length(candidates)
+
+    # The target tokenizer only when a budget is enforced with it
+    exact = bool(config.context_token_budget)
+
+    tokens = {
+        "context_tokens_before": context_tokens(candidates, exact),
+        "context_tokens_after": context_tokens(context, exact)
+    }
+
+    return context, tokens
+
+
 # ---------------------------------------------------
-# MAIN PIPELINE
+# PIPELINE STAGES
 # ---------------------------------------------------
 
-def run_pipeline(config, document_path, query):
+def index_document(config, document_path, progress_callback=None):
+    """
+    Index for a document: the result of a background prefetch_index for
+    the same document and index parameters if one was started (waiting
+    for it if still running), otherwise built here.
 
-    text = load_pdf(document_path)
+    progress_callback(pages_done, total_pages) is called while a large
+    document is streamed (see stream_index).
+    """
 
-    # ✅ CHUNKING SAFE
-    if config.chunking_mode == "adaptive":
-        chunks = adaptive_chunk_document(text)
-    else:
-        if config.chunk_size is None:
-            raise ValueError("chunk_size cannot be None in fixed mode")
+    # Memory reports must describe this run, not the background build
+    if not config.track_memory:
+
+        future = prefetched(prefetch_key(config, document_path))
+
+        if future is not None:
+            try:
+                return dict(future.result(), prefetched=True)
+            except Exception:
+                pass  # build it here and surface the error normally
+
+    return build_index(config, document_path, progress_callback)
+
+
+def prefetch_index(config, document_path):
+    """
+    Start indexing a document in the background (e.g. right after
+    upload) so a later index_document attaches to it.
+    """
+
+    return submit_prefetch(
+        prefetch_key(config, document_path),
+        lambda: build_index(config, document_path)
+    )
+
+
+def use_streaming(config, document_path):
+    """
+    Whether build_index streams the document: fixed chunking into plain
+    float32 vectors (adaptive chunking and quantization need the whole
+    document or matrix) for documents of STREAMING_MIN_PAGES or more.
+    """
+
+    return (
+        config.chunking_mode == "fixed"
+        and config.vector_storage == "float32"
+        and count_pdf_pages(document_path) >= STREAMING_MIN_PAGES
+    )
 
-        chunks = fixed_chunk_document(
-            text,
-            config.chunk_size,
-            config.chunk_overlap
+
+def build_index(config, document_path, progress_callback=None):
+    """
+    Load, chunk and embed a document. Extracted text and embeddings are
+    cached on disk (see utils.cache_manager). Large documents are
+    streamed instead (see stream_index).
+
+    With config.track_memory the per-stage memory report is returned
+    under "memory" (embedding on a cache miss, index_load on a hit).
+    """
+
+    if use_streaming(config, document_path):
+        return stream_index(config, document_path, progress_callback=progress_callback)
+
+    memory = {} if config.track_memory else None
+    fingerprint = file_fingerprint(document_path)
+
+    with track_stage(memory, "pdf_load"):
+        text, _ = TEXT_CACHE.get_or_compute(
+            fingerprint,
+            lambda: load_pdf(document_path)
         )
 
+    # ✅ CHUNKING SAFE
+    with track_stage(memory, "chunking"):
+        chunks = chunk_for_config(text, config)
+
     # ⚡ CACHE EMBEDDINGS
     key = get_cache_key(text, config)
-    path = os.path.join(CACHE_DIR, f"{key}.pkl")
+    embed_time = 0
+
+    def embed():
+        nonlocal embed_time
 
-    if os.path.exists(path):
-        chunks, vectors = pickle.load(open(path, "rb"))
-        embed_time = 0
-    else:
         vectors, embed_time = embed_chunks(chunks, config.embedding_model)
-        pickle.dump((chunks, vectors), open(path, "wb"))
-
-    # RETRIEVE
-    retrieved_chunks, scores = retrieve(
-        query,
-        vectors,
-        chunks,
-        config.retrieval_mode,
-        config.top_k
-    )
 
-    # FILTER
-    filtered = extract_gap_sentences(retrieved_chunks)
+        if config.vector_storage != "float32":
+            full_path = None
+
+            # The float32 copy costs the uncompressed size again on disk
+            # (not in RAM); without it the shortlist is re-scored from
+            # dequantized rows
+            if config.full_precision_rescore:
+                full_path = EMBEDDING_CACHE.path(key, ".f32.npy")
+                save_full_precision(vectors, full_path)
+
+            vectors = quantize_vectors(vectors, config.vector_storage, full_path)
+
+        return chunks, vectors
+
+    embed_memory = {} if memory is not None else None
+
+    with track_stage(embed_memory, "embedding"):
+        (chunks, vectors), cache_hit = EMBEDDING_CACHE.get_or_compute(key, embed)
+
+    if memory is not None:
+        memory["index_load" if cache_hit else "embedding"] = embed_memory["embedding"]
+
+    return {
+        "cache_key": key,
+        "cache_hit": cache_hit,
+        "document": fingerprint,
+        "path": document_path,
+        "chunks": chunks,
+        "vectors": vectors,
+        "embedding_time": embed_time,
+        "memory": memory
+    }
+
+
+def stream_index(
+    config,
+    document_path,
+    batch_size=STREAMING_BATCH_SIZE,
+    progress_callback=None
+):
+    """
+    build_index with memory bounded by the batch instead of the document:
+    pages are read one at a time, chunked incrementally (only the
+    unfinished sentence and overlap window cross page boundaries), and
+    embedded batch_size chunks at a time into an .npy file that is
+    memory-mapped for retrieval. Only the chunk texts are kept.
+
+    progress_callback(pages_done, total_pages) is called as pages are
+    chunked. The memory report covers the whole stream under "embedding"
+    (or "index_load" on a cache hit), as its stages interleave.
+    """
+
+    if config.chunk_size is None:
+        raise ValueError("chunk_size cannot be None in fixed mode")
+
+    memory = {} if config.track_memory else None
+    fingerprint = file_fingerprint(document_path)
+
+    key = get_stream_cache_key(fingerprint, config)
+    vector_path = EMBEDDING_CACHE.path(key, ".f32.npy")
+    embed_time = 0
+
+    def pages():
+        total = count_pdf_pages(document_path)
+        for done, page in enumerate(iter_pdf_pages(document_path), 1):
+            yield page
+            if progress_callback:
+                progress_callback(done, total)
+
+    def embed():
+        nonlocal embed_time
+
+        chunks = []
+        batch = []
+
+        with VectorFileWriter(vector_path) as writer:
+
+            def flush():
+                nonlocal embed_time
+                vectors, elapsed = embed_chunks(batch, config.embedding_model)
+                writer.append(vectors)
+                embed_time += elapsed
+                batch.clear()
+
+            for chunk in stream_fixed_chunks(pages(), config.chunk_size, config.chunk_overlap):
+                chunks.append(chunk)
+                batch.append(chunk)
+                if len(batch) == batch_size:
+                    flush()
+
+            if batch:
+                flush()
+
+        # The vectors live in vector_path, not in the cache entry
+        return chunks, None
+
+    stage_memory = {} if memory is not None else None
+
+    with track_stage(stage_memory, "embedding"):
+        (chunks, _), cache_hit = EMBEDDING_CACHE.get_or_compute(key, embed)
+
+        if not os.path.exists(vector_path):
+            # Vector file evicted on its own: rebuild the entry
+            EMBEDDING_CACHE.delete(key)
+            (chunks, _), cache_hit = EMBEDDING_CACHE.get_or_compute(key, embed)
+
+        vectors = np.load(vector_path, mmap_mode="r")
+
+    if memory is not None:
+        memory["index_load" if cache_hit else "embedding"] = stage_memory["embedding"]
+
+    return {
+        "cache_key": key,
+        "cache_hit": cache_hit,
+        "document": fingerprint,
+        "path": document_path,
+        "chunks": chunks,
+        "vectors": vectors,
+        "embedding_time": embed_time,
+        "streamed": True,
+        "memory": memory
+    }
+
+
+def retrieve_context(config, index, query, query_vector=None, retrieval_cache=None):
+    """
+    Retrieval, gap filtering and context assembly; everything before
+    generation. The result is flagged retrieval-only until
+    complete_generation fills in the output.
+
+    query_vector skips embedding the query here (see service/batching).
+    retrieval_cache=False always ranks afresh (default: unless
+    config.profile), so retrieval_time measures retrieval, not a cache
+    lookup.
+    """
+
+    if retrieval_cache is None:
+        retrieval_cache = not config.profile
+
+    start = time.time()
+
+    memory = index.get("memory")
+    if memory is not None:
+        memory = dict(memory)
+
+    with track_stage(memory, "retrieval"):
+
+        # RETRIEVE
+        retrieved_chunks, scores, retrieval_cache_hit = retrieve(
+            query,
+            index["vectors"],
+            index["chunks"],
+            config.retrieval_mode,
+            config.top_k,
+            query_vector=query_vector,
+            embedding_model=config.embedding_model,
+            index_key=index["cache_key"] if retrieval_cache else None
+        )
+
+        # FILTER
+        filtered, gap_dedup = extract_gap_sentences(
+            retrieved_chunks,
+            dedup_threshold=config.gap_dedup_threshold,
+            embedding_model=config.embedding_model
+        )
+
+        # CONTEXT
+        context, context_token_report = assemble_context(
+            config, query, filtered, retrieved_chunks
+        )
+
+    latency = {
+        "embedding_time": index["embedding_time"],
+        "retrieval_time": time.time() - start
+    }
+
+    metrics = compute_metrics(retrieved_chunks, "", latency)
+    metrics["retrieval_only"] = True
+
+    if memory is not None:
+        metrics["memory"] = memory
+
+    debug = {
+        "chunking_mode": config.chunking_mode,
+        "vector_storage": config.vector_storage,
+        "vector_bytes": store_nbytes(index["vectors"]),
+        "embedding_cache_hit": index["cache_hit"],
+        "retrieval_cache_hit": retrieval_cache_hit,
+        "index_prefetched": index.get("prefetched", False),
+        "index_streamed": index.get("streamed", False),
+        "total_chunks_created": len(index["chunks"]),
+        "retrieved_count": len(retrieved_chunks),
+        "filtered_sentence_count": len(filtered),
+        "gap_dedup": gap_dedup,
+        "gap_diversity": gap_diversity(filtered, config.embedding_model),
+        "context_sentences_used": len(context),
+        **context_token_report
+    }
+
+    return {
+        "output": "",
+        "retrieved_chunks": retrieved_chunks,
+        "filtered_context": filtered,
+        "retrieved_ids": text_ids(retrieved_chunks),
+        "filtered_ids": text_ids(filtered),
+        "index_ref": {
+            "document": index["document"],
+            "path": index["path"],
+            "cache_key": index["cache_key"]
+        },
+        "context": context,
+        "scores": scores,
+        "metrics": metrics,
+        "latency": latency,
+        "debug": debug
+    }
 
-    # CONTEXT
-    if filtered:
-        context = cap_context_length(filtered)
-    else:
-        context = cap_context_length(retrieved_chunks[:3])
+
+def complete_generation(config, result, query):
+    """
+    Run generation on a retrieval-only result.
+    """
+
+    if not is_hydrated(result):
+        result = hydrate_result(config, result)
+
+    memory = result["metrics"].get("memory")
+    if memory is not None:
+        memory = dict(memory)
 
     # GENERATE
-    output, gen_time = generate_answer(
-        query,
-        context,
-        config.temperature,
-        config.prompt_mode
+    with track_stage(memory, "generation"):
+        output, gen_time, generation_info = generate_answer(
+            query,
+            result["context"],
+            config.temperature,
+            config.prompt_mode,
+            config.generation_backend
+        )
+
+    latency = dict(result["latency"], generation_time=gen_time)
+
+    if is_hydrated(result):
+        metrics = compute_metrics(result["retrieved_chunks"], output, latency)
+    else:
+        # Chunks could not be restored (see hydrate_result): keep the
+        # retrieval metrics recorded with the run
+        metrics = dict(
+            result["metrics"],
+            output_length=len(output),
+            generation_time=gen_time,
+            total_latency=round(sum(latency.values()), 4)
+        )
+        metrics.pop("retrieval_only", None)
+
+    if memory is not None:
+        metrics["memory"] = memory
+
+    return dict(
+        result,
+        output=output,
+        latency=latency,
+        metrics=metrics,
+        debug=dict(result["debug"], generation=generation_info)
+    )
+
+
+# ---------------------------------------------------
+# MAIN PIPELINE
+# ---------------------------------------------------
+
+def run_pipeline(
+    config,
+    document_path,
+    query,
+    retrieval_only=False,
+    profile=None,
+    progress_callback=None,
+    retrieval_cache=None
+):
+    """
+    Full pipeline run. With retrieval_only=True it stops after context
+    assembly and skips the LLM call entirely.
+
+    With profile=True (default: config.profile) the run is executed under
+    cProfile and result["profile"] points at the saved profile files.
+    Profiled runs bypass the retrieval cache unless retrieval_cache=True
+    (see retrieve_context).
+    """
+
+    if profile is None:
+        profile = config.profile
+
+    if retrieval_cache is None:
+        retrieval_cache = not profile
+
+    if profile:
+        result, result_profile = profile_call(
+            run_pipeline, config, document_path, query,
+            retrieval_only=retrieval_only, profile=False,
+            progress_callback=progress_callback,
+            retrieval_cache=retrieval_cache
+        )
+        result["profile"] = result_profile
+        return result
+
+    index = index_document(config, document_path, progress_callback)
+    result = retrieve_context(config, index, query, retrieval_cache=retrieval_cache)
+
+    if retrieval_only:
+        return result
+
+    return complete_generation(config, result, query)
+
+
+# ---------------------------------------------------
+# CORPUS PIPELINE
+# ---------------------------------------------------
+
+def run_corpus_pipeline(config, corpus, query, max_workers=None, retrieval_only=False):
+    """
+    Run the pipeline over a multi-document corpus.
+
+    corpus is either a folder of PDFs, which is brought up to date with
+    update_corpus_index (only new or changed PDFs are re-indexed), or an
+    already loaded corpus index (reuse it across queries).
+    Each retrieved chunk is attributed to its source document through the
+    parallel "retrieved_sources" list.
+    """
+
+    memory = {} if config.track_memory else None
+
+    if isinstance(corpus, str):
+        with track_stage(memory, "index_load"):
+            corpus = update_corpus_index(corpus, config)
+
+    start = time.time()
+
+    with track_stage(memory, "retrieval"):
+
+        # RETRIEVE (all shards, global top-k)
+        query_vector = None
+        if config.retrieval_mode in ("dense", "hybrid"):
+            query_vector = embed_local([query], config.embedding_model)[0]
+
+        hits = sharded_retrieve(
+            query,
+            query_vector,
+            corpus,
+            config.retrieval_mode,
+            config.top_k,
+            max_workers=max_workers
+        )
+
+    shards = {s["doc_id"]: s for s in corpus["shards"]}
+
+    retrieved_chunks = []
+    retrieved_sources = []
+    scores = []
+    filtered = []
+
+    for score, chunk_id in hits:
+        doc_id, offset = corpus["chunk_map"][chunk_id]
+        shard = shards[doc_id]
+
+        retrieved_chunks.append(shard["chunks"][offset])
+        retrieved_sources.append({
+            "chunk_id": chunk_id,
+            "document": doc_id,
+            "offset": offset
+        })
+        scores.append(score)
+
+        # FILTER (precomputed gap tags)
+        filtered.extend(shard["gap_tags"][offset])
+
+    filtered, gap_dedup = select_gap_sentences(
+        filtered,
+        dedup_threshold=config.gap_dedup_threshold,
+        embedding_model=config.embedding_model
+    )
+
+    # CONTEXT
+    context, context_token_report = assemble_context(
+        config, query, filtered, retrieved_chunks
     )
 
     latency = {
-        "embedding_time": embed_time,
-        "generation_time": gen_time
+        "embedding_time": corpus["embedding_time"],
+        "retrieval_time": time.time() - start
     }
 
-    metrics = compute_metrics(retrieved_chunks, output, latency)
+    metrics = compute_metrics(retrieved_chunks, "", latency)
+    metrics["retrieval_only"] = True
+
+    if memory is not None:
+        metrics["memory"] = memory
 
     debug = {
         "chunking_mode": config.chunking_mode,
-        "total_chunks_created": len(chunks),
+        "documents_indexed": len(corpus["shards"]),
+        "total_chunks_created": len(corpus["chunk_map"]),
         "retrieved_count": len(retrieved_chunks),
+        "retrieved_documents": len({s["document"] for s in retrieved_sources}),
         "filtered_sentence_count": len(filtered),
-        "context_sentences_used": len(context)
+        "gap_dedup": gap_dedup,
+        "gap_diversity": gap_diversity(filtered, config.embedding_model),
+        "context_sentences_used": len(context),
+        **context_token_report
     }
 
-    return {
-        "output": output,
+    result = {
+        "output": "",
         "retrieved_chunks": retrieved_chunks,
+        "retrieved_sources": retrieved_sources,
         "filtered_context": filtered,
+        "retrieved_ids": text_ids(retrieved_chunks),
+        "filtered_ids": text_ids(filtered),
+        "context": context,
         "scores": scores,
         "metrics": metrics,
         "latency": latency,
         "debug": debug
     }
 
+    if retrieval_only:
+        return result
+
+    return complete_generation(config, result, query)
+
+
+# ---------------------------------------------------
+# COMPACT RECORDS
+# ---------------------------------------------------
+
+def hydrate_result(config, result):
+    """
+    Restore retrieved_chunks and filtered_context of a compact result
+    from its index (the embedding cache, or the document re-indexed with
+    config if the entry was evicted).
+
+    If the document was edited, replaced or removed since the run, the
+    result is returned as it is, with a "hydration_error" message.
+    """
+
+    ref = result["index_ref"]
+
+    cached = EMBEDDING_CACHE.get(ref["cache_key"])
+
+    if cached is not None:
+        chunks = cached[0]
+    elif os.path.exists(ref["path"]) and file_fingerprint(ref["path"]) == ref["document"]:
+        chunks = build_index(config, ref["path"])["chunks"]
+    else:
+        return dict(result, hydration_error=f"{ref['path']} changed or was removed since the run")
+
+    by_id = dict(zip(text_ids(chunks), chunks))
+
+    if any(i not in by_id for i in result["retrieved_ids"]):
+        return dict(result, hydration_error="retrieved chunks are no longer in the index")
+
+    retrieved_chunks = [by_id[i] for i in result["retrieved_ids"]]
+
+    sentences = [s for c in retrieved_chunks for s in tag_gap_sentences(c)]
+    by_id = dict(zip(text_ids(sentences), sentences))
+
+    if any(i not in by_id for i in result["filtered_ids"]):
+        return dict(result, hydration_error="gap sentences no longer match the retrieved chunks")
+
+    return dict(
+        result,
+        retrieved_chunks=retrieved_chunks,
+        filtered_context=[by_id[i] for i in result["filtered_ids"]]
+    )
+
 
 # ---------------------------------------------------
 # COMPARISON
 # ---------------------------------------------------
 
-def compute_overlap(a, b):
-    if not a and not b:
-        return 1.0
-    return round(len(set(a) & set(b)) / len(set(a) | set(b)), 3)
+def _ids(run, kind):
+    # Runs stored before ids were recorded only have text
+    if f"{kind}_ids" in run:
+        return run[f"{kind}_ids"]
+    return text_ids(run["retrieved_chunks" if kind == "retrieved" else "filtered_context"])
 
 
 def compare_runs(A, B):
 
     return {
-        "retrieval_overlap": compute_overlap(A["retrieved_chunks"], B["retrieved_chunks"]),
-        "filtered_overlap": compute_overlap(A["filtered_context"], B["filtered_context"]),
+        "retrieval_overlap": id_overlap(_ids(A, "retrieved"), _ids(B, "retrieved")),
+        "filtered_overlap": id_overlap(_ids(A, "filtered"), _ids(B, "filtered")),
         "output_length_difference": abs(A["metrics"]["output_length"] - B["metrics"]["output_length"]),
         "latency_difference": round(abs(A["metrics"]["total_latency"] - B["metrics"]["total_latency"]), 3)
     }
+
+
+def shared_stages(config_A, config_B):
+    """
+    Longest prefix of pipeline stages whose inputs are identical for both
+    configs, e.g. ["index"] when only the retrieval mode differs.
+    """
+
+    shared = []
+
+    for stage, fields in STAGE_FIELDS:
+        if _stage_inputs(config_A, stage, fields) != _stage_inputs(config_B, stage, fields):
+            break
+        shared.append(stage)
+
+    return shared
+
+
+def _stage_inputs(config, stage, fields):
+
+    inputs = tuple(getattr(config, f) for f in fields)
+
+    if stage == "index":
+        # The cache key's parameters, so sharing never disagrees with it
+        inputs += (_index_params(config),)
+
+    return inputs
+
+
+def run_comparison(config_A, config_B, document_path, query, retrieval_only=False):
+    """
+    Run two configs for an A/B comparison. The stages they share are
+    computed once; the diverging rest of each side runs concurrently, so
+    both generations overlap. Wall time approaches one run instead of two.
+
+    Memory-tracked comparisons run their sides one after the other, since
+    tracemalloc cannot tell two concurrent stages apart.
+
+    Returns (result_A, result_B, compare_runs analysis). Each result's
+    debug lists the shared stages.
+    """
+
+    shared = shared_stages(config_A, config_B)
+
+    index = index_document(config_A, document_path) if "index" in shared else None
+    retrieved = retrieve_context(config_A, index, query) if "retrieval" in shared else None
+
+    def finish(config):
+
+        result = retrieved
+        if result is None:
+            side_index = index if index is not None else index_document(config, document_path)
+            result = retrieve_context(config, side_index, query)
+
+        if not retrieval_only:
+            result = complete_generation(config, result, query)
+
+        return dict(result, debug=dict(result["debug"], shared_stages=shared))
+
+    if "generation" in shared or (retrieval_only and "retrieval" in shared):
+        result_A = finish(config_A)
+        result_B = dict(result_A)
+
+    elif config_A.track_memory or config_B.track_memory:
+        result_A = finish(config_A)
+        result_B = finish(config_B)
+
+    else:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future_B = pool.submit(finish, config_B)
+            result_A = finish(config_A)
+            result_B = future_B.result()
+
+    return result_A, result_B, compare_runs(result_A, result_B)
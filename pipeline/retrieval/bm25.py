@@ -1,3 +1,6 @@
+import math
+from collections import Counter
+
 from rank_bm25 import BM25Okapi
 
 def bm25_retrieve(query, chunks, top_k):
@@ -12,3 +15,60 @@ def bm25_retrieve(query, chunks, top_k):
     top_scores = [scores[i] for i in top_indices]
 
     return results, top_scores
+
+
+# --------------------------------------------
+# POSTINGS (SHARDED / CORPUS MODE)
+# --------------------------------------------
+
+def build_bm25_postings(chunks):
+    """
+    Build an inverted index for one shard.
+
+    Returns
+    -------
+    postings : dict[str, list[tuple[int, int]]]
+        term -> [(chunk position, term frequency), ...]
+    doc_lengths : list[int]
+    """
+
+    postings = {}
+    doc_lengths = []
+
+    for i, chunk in enumerate(chunks):
+        tokens = chunk.split()
+        doc_lengths.append(len(tokens))
+
+        for term, tf in Counter(tokens).items():
+            postings.setdefault(term, []).append((i, tf))
+
+    return postings, doc_lengths
+
+
+def bm25_postings_scores(query, postings, doc_lengths, stats, k1=1.5, b=0.75):
+    """
+    Okapi BM25 over a shard's postings using corpus-wide statistics,
+    so scores from different shards are directly comparable.
+
+    stats holds "total_docs", "avg_doc_length" and "doc_freqs" for the
+    whole corpus. Only chunks sharing a term with the query are scored.
+    """
+
+    scores = {}
+    total_docs = stats["total_docs"]
+    avg_doc_length = stats["avg_doc_length"] or 1
+
+    for term in query.split():
+
+        entries = postings.get(term)
+        if not entries:
+            continue
+
+        df = stats["doc_freqs"].get(term, len(entries))
+        idf = math.log((total_docs - df + 0.5) / (df + 0.5) + 1)
+
+        for idx, tf in entries:
+            norm = k1 * (1 - b + b * doc_lengths[idx] / avg_doc_length)
+            scores[idx] = scores.get(idx, 0) + idf * tf * (k1 + 1) / (tf + norm)
+
+    return scores
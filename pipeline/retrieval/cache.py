@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+
+# Rankings are computed at least this deep (the sidebar's top_k maximum),
+# so a sweep over top_k fills one entry and hits it for every other k
+CACHED_TOP_K = 10
+
+RETRIEVAL_CACHE_SIZE = 512
+
+
+class RetrievalCache:
+    """
+    In-memory LRU of retrieval rankings per (index, query, mode, MMR
+    lambda).
+
+    Plain ranking and greedy MMR at depth k are prefixes of the same
+    ranking at a larger depth, so an entry computed at depth K serves
+    every top_k <= K by slicing. Hybrid entries hold the dense and BM25
+    component rankings and are fused per top_k (see fuse_rankings).
+    """
+
+    def __init__(self, max_entries=RETRIEVAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, top_k):
+        """
+        Rankings for key if cached at least top_k deep, else None.
+        """
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < top_k:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, depth, rankings):
+
+        with self._lock:
+
+            current = self._entries.get(key)
+            if current is not None and current[0] > depth:
+                return
+
+            self._entries[key] = (depth, rankings)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+RETRIEVAL_CACHE = RetrievalCache()
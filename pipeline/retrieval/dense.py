@@ -1,13 +1,40 @@
 import numpy as np
 
+from pipeline.embedding.quantization import (
+    approximate_similarities,
+    full_precision_rows,
+    is_quantized
+)
+
 # --------------------------------------------
-# OPTIONAL FAISS IMPORT (SAFE)
+# OPTIONAL FAISS IMPORT (SAFE, ON FIRST USE)
 # --------------------------------------------
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    FAISS_AVAILABLE = False
+_faiss = None
+
+
+def get_faiss():
+    """
+    The faiss module, or None when it is not installed. Imported on the
+    first dense search rather than at startup.
+    """
+
+    global _faiss
+
+    if _faiss is None:
+        try:
+            import faiss
+            _faiss = faiss
+        except ImportError:
+            _faiss = False
+
+    return _faiss or None
+
+
+# MMR trade-off between relevance and diversity
+MMR_LAMBDA = 0.7
+
+# Compressed stores re-score at least this many shortlisted rows
+RESCORE_DEPTH = 50
 
 
 # --------------------------------------------
@@ -35,7 +62,7 @@ def compute_similarity_scores(query_vector, vectors):
 # MAIN RETRIEVER
 # --------------------------------------------
 
-def dense_retrieve(query_vector, vectors, chunks, top_k, lambda_param=0.7):
+def dense_retrieve(query_vector, vectors, chunks, top_k, lambda_param=MMR_LAMBDA):
     """
     Dense retrieval with MMR (Maximal Marginal Relevance)
 
@@ -44,19 +71,39 @@ def dense_retrieve(query_vector, vectors, chunks, top_k, lambda_param=0.7):
     - Numpy fallback (deployment-safe)
     """
 
+    selected_indices, selected_scores = dense_retrieve_indices(
+        query_vector, vectors, top_k, lambda_param
+    )
+
+    return [chunks[i] for i in selected_indices], selected_scores
+
+
+def dense_retrieve_indices(query_vector, vectors, top_k, lambda_param=MMR_LAMBDA):
+    """
+    Same as dense_retrieve, but returns chunk positions instead of text.
+    """
+
+    if is_quantized(vectors):
+        return quantized_dense_retrieve_indices(query_vector, vectors, top_k, lambda_param)
+
+    n = len(vectors)
+
     # --------------------------------------------
     # STEP 1: GET SIMILARITY SCORES
     # --------------------------------------------
 
-    if FAISS_AVAILABLE:
+    faiss = get_faiss()
+
+    if faiss is not None:
         dim = vectors.shape[1]
         index = faiss.IndexFlatL2(dim)
         index.add(vectors)
 
-        D, I = index.search(np.array([query_vector]), len(chunks))
+        D, I = index.search(np.array([query_vector]), n)
 
-        # Convert L2 distance → similarity
-        similarities = np.array([1 / (1 + d) for d in D[0]])
+        # Convert L2 distance → similarity, indexed by chunk position
+        similarities = np.zeros(n)
+        similarities[I[0]] = 1 / (1 + D[0])
         candidate_indices = I[0]
 
     else:
@@ -69,11 +116,19 @@ def dense_retrieve(query_vector, vectors, chunks, top_k, lambda_param=0.7):
     # STEP 2: MMR SELECTION
     # --------------------------------------------
 
-    selected = []
+    return mmr_select(similarities, vectors, candidate_indices, top_k, lambda_param)
+
+
+def mmr_select(similarities, vectors, candidate_indices, top_k, lambda_param=MMR_LAMBDA):
+    """
+    Greedy MMR over candidate_indices. similarities and vectors are
+    indexed by the same positions as the candidates.
+    """
+
     selected_scores = []
     selected_indices = []
 
-    for _ in range(min(top_k, len(chunks))):
+    for _ in range(min(top_k, len(candidate_indices))):
 
         best_score = -1
         best_idx = -1
@@ -101,8 +156,72 @@ def dense_retrieve(query_vector, vectors, chunks, top_k, lambda_param=0.7):
         if best_idx == -1:
             break
 
-        selected_indices.append(best_idx)
-        selected.append(chunks[best_idx])
+        selected_indices.append(int(best_idx))
         selected_scores.append(best_score)
 
-    return selected, selected_scores
+    return selected_indices, selected_scores
+
+
+# --------------------------------------------
+# COMPRESSED VECTORS (float16 / int8)
+# --------------------------------------------
+
+def quantized_dense_retrieve(
+    query_vector,
+    store,
+    chunks,
+    top_k,
+    lambda_param=MMR_LAMBDA,
+    rescore_depth=RESCORE_DEPTH
+):
+    """
+    dense_retrieve over a compressed store (see quantize_vectors).
+    """
+
+    selected_indices, selected_scores = quantized_dense_retrieve_indices(
+        query_vector, store, top_k, lambda_param, rescore_depth
+    )
+
+    return [chunks[i] for i in selected_indices], selected_scores
+
+
+def shortlist_depth(vectors, top_k, rescore_depth=RESCORE_DEPTH):
+    """
+    Rows re-scored for a compressed store (None for plain vectors). MMR
+    over the same shortlist is a prefix across top_k values.
+    """
+
+    if not is_quantized(vectors):
+        return None
+
+    return min(len(vectors["data"]), max(rescore_depth, 4 * top_k))
+
+
+def quantized_dense_retrieve_indices(
+    query_vector,
+    store,
+    top_k,
+    lambda_param=MMR_LAMBDA,
+    rescore_depth=RESCORE_DEPTH
+):
+    """
+    Shortlist with approximate scores over the compressed matrix, then
+    re-score the shortlist in float32 and run MMR on it.
+    """
+
+    depth = shortlist_depth(store, top_k, rescore_depth)
+
+    if depth == 0:
+        return [], []
+
+    approx = approximate_similarities(query_vector, store)
+    # Sorted rows keep memory-mapped reads sequential
+    shortlist = np.sort(np.argpartition(-approx, depth - 1)[:depth])
+    exact_vectors = full_precision_rows(store, shortlist)
+
+    exact = compute_similarity_scores(query_vector, exact_vectors)
+    order = np.argsort(exact)[::-1]
+
+    local_indices, scores = mmr_select(exact, exact_vectors, order, top_k, lambda_param)
+
+    return [int(shortlist[i]) for i in local_indices], scores
@@ -3,17 +3,30 @@ def hybrid_retrieve(query, query_vector, vectors, chunks, top_k, dense_func, bm2
     Hybrid retrieval using score fusion.
     """
 
-    dense_results, dense_scores = dense_func(query_vector, vectors, chunks, top_k)
-    bm25_results, bm25_scores = bm25_func(query, chunks, top_k)
+    return fuse_rankings(
+        dense_func(query_vector, vectors, chunks, top_k),
+        bm25_func(query, chunks, top_k),
+        top_k
+    )
+
+
+def fuse_rankings(dense_ranking, bm25_ranking, top_k):
+    """
+    Score fusion of the top_k of each component ranking (results, scores).
+    The rankings may be deeper than top_k (see retrieval/cache.py).
+    """
+
+    dense_results, dense_scores = dense_ranking
+    bm25_results, bm25_scores = bm25_ranking
 
     score_dict = {}
 
     # Add dense scores
-    for chunk, score in zip(dense_results, dense_scores):
+    for chunk, score in zip(dense_results[:top_k], dense_scores[:top_k]):
         score_dict[chunk] = score_dict.get(chunk, 0) + score
 
     # Add BM25 scores
-    for chunk, score in zip(bm25_results, bm25_scores):
+    for chunk, score in zip(bm25_results[:top_k], bm25_scores[:top_k]):
         score_dict[chunk] = score_dict.get(chunk, 0) + score
 
     ranked = sorted(score_dict.items(), key=lambda x: x[1], reverse=True)
@@ -1,28 +1,75 @@
-from .dense import dense_retrieve
+from .dense import MMR_LAMBDA, dense_retrieve, shortlist_depth
 from .bm25 import bm25_retrieve
-from .hybrid import hybrid_retrieve
+from .hybrid import fuse_rankings
+from .cache import CACHED_TOP_K, RETRIEVAL_CACHE
 from pipeline.embedding.local_embedding import embed_local
 
-def retrieve(query, vectors, chunks, mode, top_k):
+RETRIEVAL_MODES = ("dense", "bm25", "hybrid")
 
-    if mode == "dense":
-        query_vector = embed_local([query])[0]
-        return dense_retrieve(query_vector, vectors, chunks, top_k)
+def retrieve(
+    query,
+    vectors,
+    chunks,
+    mode,
+    top_k,
+    query_vector=None,
+    embedding_model="local",
+    index_key=None
+):
+    """
+    query_vector can be passed in when the query was already embedded
+    (e.g. batched with other queries). Otherwise the query is embedded
+    with embedding_model, which must be the model the chunks used.
 
-    elif mode == "bm25":
-        return bm25_retrieve(query, chunks, top_k)
+    With index_key (the index's cache key) rankings are cached per
+    (index, query, mode, MMR lambda) and reused for any smaller top_k,
+    so sweeps over top_k retrieve once (see retrieval/cache.py).
 
-    elif mode == "hybrid":
-        query_vector = embed_local([query])[0]
-        return hybrid_retrieve(
-            query,
-            query_vector,
-            vectors,
-            chunks,
-            top_k,
-            dense_retrieve,
-            bm25_retrieve
-        )
+    Returns
+    -------
+    results, scores, cache_hit : (list, list, bool)
+    """
 
-    else:
+    if mode not in RETRIEVAL_MODES:
         raise ValueError("Invalid retrieval mode")
+
+    key = None
+    depth = top_k
+
+    if index_key is not None:
+
+        # Compressed stores shortlist by top_k: only share entries (and
+        # compute deeper) where the shortlist is the same
+        key = (index_key, query, mode, MMR_LAMBDA, shortlist_depth(vectors, top_k))
+
+        rankings = RETRIEVAL_CACHE.get(key, top_k)
+        if rankings is not None:
+            return (*_slice_rankings(mode, rankings, top_k), True)
+
+        if shortlist_depth(vectors, CACHED_TOP_K) == key[-1]:
+            depth = max(top_k, CACHED_TOP_K)
+
+    if mode in ("dense", "hybrid") and query_vector is None:
+        query_vector = embed_local([query], embedding_model)[0]
+
+    rankings = {}
+
+    if mode in ("dense", "hybrid"):
+        rankings["dense"] = dense_retrieve(query_vector, vectors, chunks, depth)
+
+    if mode in ("bm25", "hybrid"):
+        rankings["bm25"] = bm25_retrieve(query, chunks, depth)
+
+    if key is not None:
+        RETRIEVAL_CACHE.put(key, depth, rankings)
+
+    return (*_slice_rankings(mode, rankings, top_k), False)
+
+
+def _slice_rankings(mode, rankings, top_k):
+
+    if mode == "hybrid":
+        return fuse_rankings(rankings["dense"], rankings["bm25"], top_k)
+
+    results, scores = rankings[mode]
+    return results[:top_k], scores[:top_k]
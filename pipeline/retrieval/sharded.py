@@ -0,0 +1,79 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+from .dense import dense_retrieve_indices
+from .bm25 import bm25_postings_scores
+
+
+# --------------------------------------------
+# PER-SHARD SEARCH
+# --------------------------------------------
+
+def _search_shard(shard, query, query_vector, mode, top_k, stats):
+    """
+    Top-k (score, offset) pairs of one shard, best first.
+    """
+
+    if not shard["chunks"]:
+        return []
+
+    if mode == "dense":
+        indices, scores = dense_retrieve_indices(query_vector, shard["vectors"], top_k)
+        return list(zip(scores, indices))
+
+    bm25_scores = bm25_postings_scores(
+        query, shard["postings"], shard["doc_lengths"], stats
+    )
+    bm25_top = heapq.nlargest(top_k, bm25_scores.items(), key=lambda x: x[1])
+
+    if mode == "bm25":
+        return [(score, idx) for idx, score in bm25_top]
+
+    if mode == "hybrid":
+        indices, scores = dense_retrieve_indices(query_vector, shard["vectors"], top_k)
+
+        fused = {}
+        for idx, score in zip(indices, scores):
+            fused[idx] = fused.get(idx, 0) + score
+        for idx, score in bm25_top:
+            fused[idx] = fused.get(idx, 0) + score
+
+        return heapq.nlargest(top_k, ((s, i) for i, s in fused.items()))
+
+    raise ValueError("Invalid retrieval mode")
+
+
+# --------------------------------------------
+# SHARDED RETRIEVAL
+# --------------------------------------------
+
+def sharded_retrieve(query, query_vector, corpus, mode, top_k, max_workers=None):
+    """
+    Search every shard in parallel threads and merge with a global
+    heap-based top-k.
+
+    Returns
+    -------
+    hits : list[tuple[float, int]]
+        (score, global chunk id), best first.
+    """
+
+    shards = corpus["shards"]
+    stats = corpus["bm25_stats"]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        per_shard = pool.map(
+            lambda shard: [
+                (score, shard["base"] + offset)
+                for score, offset in _search_shard(
+                    shard, query, query_vector, mode, top_k, stats
+                )
+            ],
+            shards
+        )
+
+        return heapq.nlargest(
+            top_k,
+            (hit for hits in per_shard for hit in hits),
+            key=lambda hit: hit[0]
+        )
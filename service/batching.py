@@ -0,0 +1,72 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text embedding requests.
+
+    Callers block in embed(text); a background thread takes the first
+    waiting request, collects whatever else arrives within window seconds
+    (up to max_batch texts) and embeds them with one embed_fn call.
+    """
+
+    def __init__(self, embed_fn, max_batch=32, window=0.005):
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = 0
+        self.requests = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def embed(self, text, timeout=None):
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout)
+
+    def _collect(self):
+
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        try:
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(self._queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+
+        return batch
+
+    def _run(self):
+
+        while True:
+
+            batch = self._collect()
+
+            try:
+                vectors = self.embed_fn([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,82 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+
+DEFAULT_PORT = 8765
+
+
+class ServiceError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class PipelineClient:
+    """
+    Client for service.server. Busy responses (503) are retried up to
+    retries times, honouring Retry-After.
+
+        client = PipelineClient()
+        client.index("sample.pdf", {"chunk_size": 400})
+        result = client.query("sample.pdf", "What research gaps exist?")
+    """
+
+    def __init__(self, base_url=f"http://127.0.0.1:{DEFAULT_PORT}", timeout=600, retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+
+    def _request(self, method, path, payload=None):
+
+        data = json.dumps(payload).encode() if payload is not None else None
+
+        for attempt in range(self.retries + 1):
+
+            request = urllib.request.Request(
+                self.base_url + path,
+                data=data,
+                method=method,
+                headers={"Content-Type": "application/json"}
+            )
+
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+
+            except urllib.error.HTTPError as e:
+                body = e.read()
+                try:
+                    message = json.loads(body).get("error", "")
+                except ValueError:
+                    message = body.decode(errors="replace")
+
+                if e.code == 503 and attempt < self.retries:
+                    time.sleep(float(e.headers.get("Retry-After", 1)))
+                    continue
+
+                raise ServiceError(e.code, message) from None
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def index(self, document, config=None):
+        return self._request("POST", "/index", {"document": document, "config": config or {}})
+
+    def query(self, document, query, config=None, retrieval_only=False):
+        return self._request("POST", "/query", {
+            "document": document,
+            "query": query,
+            "config": config or {},
+            "retrieval_only": retrieval_only
+        })
+
+    def sweep(self, document, query, configs, retrieval_only=False):
+        return self._request("POST", "/sweep", {
+            "document": document,
+            "query": query,
+            "configs": configs,
+            "retrieval_only": retrieval_only
+        })["runs"]
@@ -0,0 +1,349 @@
+"""
+Long-lived pipeline service: models and document indexes stay in memory
+between requests, and concurrent query embeddings are micro-batched.
+
+    python -m service.server --port 8765
+
+Endpoints (JSON bodies; configs are partial dicts over the app defaults):
+
+    GET  /health
+    POST /index  {"document": path, "config": {...}}
+    POST /query  {"document": path, "query": str, "config": {...}, "retrieval_only": bool}
+    POST /sweep  {"document": path, "query": str, "configs": [{...}, ...], "retrieval_only": bool}
+
+When more than --max-pending requests are waiting or running, new ones
+get 503 with Retry-After instead of queueing without bound.
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+from functools import partial
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.orchestrator import index_document, retrieve_context, complete_generation
+from pipeline.embedding.local_embedding import DEFAULT_EMBEDDING_MODEL, embed_local
+from pipeline.generation.backends import BACKEND_CLASSES, get_backend, warm_up
+from pipeline.indexing.incremental import index_params
+from pipeline.retrieval.cache import RETRIEVAL_CACHE
+from utils.cache_manager import file_fingerprint
+from utils.config_schema import config_from_dict
+from utils.experiment_logger import log_single_run
+from service.batching import EmbeddingBatcher
+from service.client import DEFAULT_PORT
+
+
+# Result fields sent back to clients (vectors and indexes stay server-side)
+RESULT_FIELDS = (
+    "output", "retrieved_chunks", "retrieved_sources", "filtered_context",
+    "context", "scores", "metrics", "latency", "debug", "profile"
+)
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+# ----------------------------
+# Service
+# ----------------------------
+
+class PipelineService:
+    """
+    max_pending : requests admitted at once (running or waiting)
+    max_workers : requests running pipeline stages at once
+    max_indexes : warm document indexes kept in memory (LRU)
+    """
+
+    def __init__(
+        self,
+        max_pending=64,
+        max_workers=4,
+        max_indexes=16,
+        batch_window=0.005,
+        max_batch=32
+    ):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._batchers = {}
+        self._batcher_lock = threading.Lock()
+
+        self.max_indexes = max_indexes
+
+        self._indexes = OrderedDict()
+        self._index_lock = threading.Lock()
+
+        self._admission = threading.BoundedSemaphore(max_pending)
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+        # Load the embedding and generation models before the first request
+        self.batcher(DEFAULT_EMBEDDING_MODEL).embed("warm-up")
+        self.generation_cold_start = warm_up("ollama")
+
+    # ---------------- ADMISSION ----------------
+
+    def admit(self):
+        if not self._admission.acquire(blocking=False):
+            raise ServiceBusy()
+        with self._pending_lock:
+            self._pending += 1
+
+    def release(self):
+        with self._pending_lock:
+            self._pending -= 1
+        self._admission.release()
+
+    # ---------------- EMBEDDING ----------------
+
+    def batcher(self, embedding_model):
+        """
+        Query embedding batcher per embedding model, so a query is always
+        embedded by the model its index was built with.
+        """
+
+        with self._batcher_lock:
+            if embedding_model not in self._batchers:
+                self._batchers[embedding_model] = EmbeddingBatcher(
+                    partial(embed_local, model_name=embedding_model),
+                    self.max_batch,
+                    self.batch_window
+                )
+            return self._batchers[embedding_model]
+
+    # ---------------- INDEXES ----------------
+
+    def get_index(self, config, document):
+        """
+        Warm index for (document content, index parameters), built through
+        the on-disk embedding cache on a miss.
+        """
+
+        key = (file_fingerprint(document), json.dumps(index_params(config), sort_keys=True))
+
+        with self._index_lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key], True
+
+        index = index_document(config, document)
+
+        with self._index_lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+        return index, False
+
+    # ---------------- ENDPOINTS ----------------
+
+    def _run_query(self, config, document, query, retrieval_only):
+
+        with self._workers:
+
+            index, _ = self.get_index(config, document)
+
+            query_vector = None
+            if config.retrieval_mode in ("dense", "hybrid"):
+                query_vector = self.batcher(config.embedding_model).embed(query)
+
+            result = retrieve_context(config, index, query, query_vector=query_vector)
+
+            if not retrieval_only:
+                result = complete_generation(config, result, query)
+
+        return result
+
+    def index(self, payload):
+
+        config = config_from_dict(payload.get("config", {}))
+
+        with self._workers:
+            index, warm = self.get_index(config, payload["document"])
+
+        return {
+            "document": payload["document"],
+            "cache_key": index["cache_key"],
+            "chunks": len(index["chunks"]),
+            "embedding_cache_hit": index["cache_hit"],
+            "warm": warm
+        }
+
+    def query(self, payload):
+
+        config = config_from_dict(payload.get("config", {}))
+
+        result = self._run_query(
+            config, payload["document"], payload["query"],
+            payload.get("retrieval_only", False)
+        )
+
+        return {k: result[k] for k in RESULT_FIELDS if k in result}
+
+    def sweep(self, payload):
+        """
+        Run each config against the warm index and log it like a single
+        run from the app.
+        """
+
+        runs = []
+
+        for values in payload["configs"]:
+
+            config = config_from_dict(values)
+
+            result = self._run_query(
+                config, payload["document"], payload["query"],
+                payload.get("retrieval_only", False)
+            )
+
+            log_single_run(config, result)
+
+            runs.append({
+                "config": vars(config),
+                "metrics": result["metrics"],
+                "debug": result["debug"]
+            })
+
+        return {"runs": runs}
+
+    def health(self):
+        with self._index_lock:
+            warm = len(self._indexes)
+        return {
+            "status": "ok",
+            "pending": self._pending,
+            "warm_indexes": warm,
+            "embedding_batches": {
+                name: batcher.stats() for name, batcher in self._batchers.items()
+            },
+            "retrieval_cache": RETRIEVAL_CACHE.stats(),
+            "generation": [get_backend(name).stats() for name in BACKEND_CLASSES]
+        }
+
+
+# ----------------------------
+# HTTP
+# ----------------------------
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def make_handler(service):
+
+    routes = {
+        "/index": service.index,
+        "/query": service.query,
+        "/sweep": service.sweep
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body, default=_json_default).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, service.health())
+            else:
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def do_POST(self):
+
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length)
+
+            if self.path not in routes:
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+                return
+
+            try:
+                service.admit()
+            except ServiceBusy:
+                self._send(503, {"error": "Service busy"}, {"Retry-After": "1"})
+                return
+
+            try:
+                payload = json.loads(raw or b"{}")
+                self._send(200, routes[self.path](payload))
+            except (KeyError, TypeError, ValueError) as e:
+                self._send(400, {"error": f"{type(e).__name__}: {e}"})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            finally:
+                service.release()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, **service_kwargs):
+
+    service = PipelineService(**service_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+
+    return server, service
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m service.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-indexes", type=int, default=16)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    server, _ = serve(
+        args.host,
+        args.port,
+        max_pending=args.max_pending,
+        max_workers=args.workers,
+        max_indexes=args.max_indexes,
+        batch_window=args.batch_window_ms / 1000,
+        max_batch=args.max_batch
+    )
+
+    print(f"Pipeline service on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from dataclasses import replace
+
+from pipeline import orchestrator
+from pipeline.orchestrator import shared_stages, run_comparison
+from utils.config_schema import config_from_dict
+
+
+def _config(**values):
+    return config_from_dict(dict({"vector_storage": "int8"}, **values))
+
+
+def test_full_precision_rescore_is_an_index_input():
+
+    config_A = _config()
+    config_B = replace(config_A, full_precision_rescore=False)
+
+    assert shared_stages(config_A, config_B) == []
+
+
+def test_full_precision_rescore_ignored_for_float32():
+
+    config_A = _config(vector_storage="float32")
+    config_B = replace(config_A, full_precision_rescore=False)
+
+    assert shared_stages(config_A, config_B) == ["index", "retrieval", "generation"]
+
+
+def test_comparison_builds_an_index_per_rescore_setting(monkeypatch):
+
+    built = []
+
+    def index_document(config, document_path, progress_callback=None):
+        built.append(config.full_precision_rescore)
+        return {"rescore": config.full_precision_rescore}
+
+    def retrieve_context(config, index, query, query_vector=None, retrieval_cache=None):
+        return {
+            "output": "",
+            "retrieved_ids": [index["rescore"]],
+            "filtered_ids": [],
+            "debug": {}
+        }
+
+    monkeypatch.setattr(orchestrator, "index_document", index_document)
+    monkeypatch.setattr(orchestrator, "retrieve_context", retrieve_context)
+    monkeypatch.setattr(orchestrator, "compare_runs", lambda A, B: None)
+
+    config_A = _config()
+    config_B = replace(config_A, full_precision_rescore=False)
+
+    result_A, result_B, _ = run_comparison(
+        config_A, config_B, "paper.pdf", "What research gaps exist?", retrieval_only=True
+    )
+
+    assert sorted(built) == [False, True]
+    assert result_A["retrieved_ids"] == [True]
+    assert result_B["retrieved_ids"] == [False]
+    assert result_B["debug"]["shared_stages"] == []
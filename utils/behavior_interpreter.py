@@ -1,4 +1,8 @@
-def interpret_metrics(result):
+# Seconds of total latency above which a run is flagged as slow
+LATENCY_THRESHOLD = 50
+
+
+def interpret_metrics(result, latency_threshold=LATENCY_THRESHOLD):
 
     insights = []
 
@@ -12,9 +16,12 @@ def interpret_metrics(result):
     if signals >= 8:
         insights.append("Strong signal extraction → rich context provided")
 
-    if latency > 50:
+    if latency > latency_threshold:
         insights.append("High latency → large context or complex reasoning")
 
+    if result["metrics"].get("retrieval_only"):
+        return insights
+
     if output_len > 1200:
         insights.append("Broad output → high exploration")
 
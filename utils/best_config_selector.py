@@ -1,6 +1,7 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 
 
 # ----------------------------
@@ -24,13 +25,10 @@ def normalize(values):
 # Global embedding model
 # ----------------------------
 
-_model = None
-
 def get_model():
-    global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _model
+    # Same model (and instance) the pipeline embeds with, loaded on first use
+    from pipeline.embedding.local_embedding import get_model as get_embedding_model
+    return get_embedding_model()
 
 
 # ----------------------------
@@ -46,125 +44,451 @@ def compute_diversity(sentences):
     if not sentences or len(sentences) < 2:
         return 0.5  # neutral
 
+    return _diversity(tuple(sentences))
+
+
+@lru_cache(maxsize=4096)
+def _diversity(sentences):
+
+    from sklearn.metrics.pairwise import cosine_similarity
+
     model = get_model()
-    embeddings = model.encode(sentences)
+    embeddings = model.encode(list(sentences))
 
     sim_matrix = cosine_similarity(embeddings)
 
-    sims = []
-
-    for i in range(len(sim_matrix)):
-        for j in range(i + 1, len(sim_matrix)):
-            sims.append(sim_matrix[i][j])
+    # Mean of the strict upper triangle
+    upper = sim_matrix[np.triu_indices(len(sim_matrix), k=1)]
 
-    if not sims:
+    if upper.size == 0:
         return 0.5
 
-    avg_similarity = np.mean(sims)
+    return float(1 - upper.mean())
+
+
+# ----------------------------
+# Metric Columns
+# ----------------------------
+
+def _stability_by_config(history):
+    """
+    Latest repeated-trial stability score per config (see trial_runner).
+    """
+
+    return {
+        _config_key(r["config"]): r["stability"]
+        for r in history
+        if r["mode"] == "trials"
+    }
+
+
+def _config_key(config):
+    # Instrumentation flags do not change results
+    return tuple(sorted(
+        (k, v) for k, v in config.items() if k not in ("profile", "track_memory")
+    ))
 
-    diversity = 1 - avg_similarity
 
-    return float(diversity)
+def metric_columns(runs, names, history=None):
+    """
+    Pull per-run metrics as NumPy columns.
+
+    Supported names: gap_density, filtered_sentence_count (alias
+    richness), retrieved_count, output_length, total_latency (alias
+    latency), diversity, stability. Diversity is the run's logged
+    gap_diversity. Stability comes from "trials" entries in history and
+    is 0 for configs without repeated trials.
+    """
+
+    columns = {}
+
+    filtered = np.array([r["debug"]["filtered_sentence_count"] for r in runs], dtype=float)
+    retrieved = np.array([r["metrics"]["retrieved_count"] for r in runs], dtype=float)
+
+    for name in names:
+
+        if name in ("richness", "filtered_sentence_count"):
+            col = filtered
+
+        elif name == "gap_density":
+            col = np.divide(filtered, retrieved, out=np.zeros_like(filtered), where=retrieved > 0)
+
+        elif name == "retrieved_count":
+            col = retrieved
+
+        elif name in ("latency", "total_latency"):
+            col = np.array([r["metrics"]["total_latency"] for r in runs], dtype=float)
+
+        elif name == "output_length":
+            col = np.array([r["metrics"]["output_length"] for r in runs], dtype=float)
+
+        elif name == "diversity":
+            # Logged at run time (records keep no sentences); neutral for older runs
+            col = np.array([r["debug"].get("gap_diversity", 0.5) for r in runs], dtype=float)
+
+        elif name == "stability":
+            stability = _stability_by_config(history or [])
+            col = np.array([stability.get(_config_key(r["config"]), 0.0) for r in runs], dtype=float)
+
+        else:
+            raise ValueError(f"Unknown metric: {name}")
+
+        columns[name] = col
+
+    return columns
+
+
+def normalize_column(col):
+    """
+    Vectorised normalize(): min-max to [0, 1], 0.5 for constant columns.
+    """
+
+    if col.size == 0:
+        return col
+
+    span = col.max() - col.min()
+
+    if span == 0:
+        return np.full(col.shape, 0.5)
+
+    return (col - col.min()) / span
+
+
+# ----------------------------
+# Objective Scoring
+# ----------------------------
+
+OBJECTIVE_WEIGHTS = {
+    "richness": {
+        "gap_density": 0.35,
+        "filtered_sentence_count": 0.20,
+        "retrieved_count": 0.15,
+        "diversity": 0.15,
+        "output_length": 0.10,
+        "total_latency": -0.05
+    },
+    "balanced": {
+        "filtered_sentence_count": 0.35,
+        "output_length": 0.2,
+        "retrieved_count": 0.15,
+        "total_latency": -0.3
+    }
+}
+
+
+def score_runs(runs, objective="balanced"):
+    """
+    Objective score per run, normalised within the given runs.
+    Runs are experiment log records (config / metrics / debug).
+    """
+
+    if not runs:
+        return []
+
+    weights = OBJECTIVE_WEIGHTS.get(objective, OBJECTIVE_WEIGHTS["balanced"])
+    columns = metric_columns(runs, weights.keys())
+
+    scores = np.zeros(len(runs))
+
+    for name, weight in weights.items():
+        scores += weight * normalize_column(columns[name])
+
+    return scores.tolist()
 
 
 # ----------------------------
 # Best Config Selector
 # ----------------------------
 
-def select_best_config(history, objective="balanced"):
+_selection_cache = {}
 
-    single_runs = [r for r in history if r["mode"] == "single"]
 
-    if not single_runs:
-        return None
+def history_version(history):
+    """
+    The log is append-only, so length plus last timestamp identifies it.
+    """
 
-    # Only stable regime
-    stable_runs = [
-        r for r in single_runs
-        if r["config"]["chunk_size"] in [400, 600, 800]
-    ]
+    if not history:
+        return (0, None)
 
-    if not stable_runs:
-        return None
+    return (len(history), history[-1].get("timestamp"))
 
-    filtered_counts = [
-        r["debug"]["filtered_sentence_count"]
-        for r in stable_runs
-    ]
 
-    retrieved_counts = [
-        r["metrics"]["retrieved_count"]
-        for r in stable_runs
-    ]
+def _cached(kind, history, args, compute):
 
-    output_lengths = [
-        r["metrics"]["output_length"]
-        for r in stable_runs
-    ]
+    key = (kind, history_version(history), args)
 
-    latencies = [
-        r["metrics"]["total_latency"]
-        for r in stable_runs
-    ]
+    if key not in _selection_cache:
+        if len(_selection_cache) > 64:
+            _selection_cache.clear()
+        _selection_cache[key] = compute()
 
-    # Gap density
-    gap_density = [
-        (filtered_counts[i] / retrieved_counts[i])
-        if retrieved_counts[i] > 0 else 0
-        for i in range(len(stable_runs))
-    ]
+    return _selection_cache[key]
 
-    # Diversity
-    diversity_scores = [
-        compute_diversity(r.get("filtered_context", []))
-        for r in stable_runs
+
+def _scored_runs(history):
+    # Retrieval-only runs have no output or generation latency to score
+    return [
+        r for r in history
+        if r["mode"] == "single" and not r.get("retrieval_only")
     ]
 
-    # Normalize everything
-    norm_density = normalize(gap_density)
-    norm_filtered = normalize(filtered_counts)
-    norm_retrieved = normalize(retrieved_counts)
-    norm_output = normalize(output_lengths)
-    norm_latency = normalize(latencies)
-    norm_diversity = normalize(diversity_scores)
 
-    scored = []
+def select_best_config(history, objective="balanced", chunk_sizes=(400, 600, 800)):
+    """
+    Highest-scoring logged run. chunk_sizes restricts the candidates to
+    the stable chunking regime; pass None to consider every run.
 
-    for i, run in enumerate(stable_runs):
+    Results are cached per history version.
+    """
+
+    args = (objective, tuple(chunk_sizes) if chunk_sizes else None)
 
-        if objective == "richness":
+    return _cached(
+        "best",
+        history,
+        args,
+        lambda: _select_best_config(history, objective, chunk_sizes)
+    )
 
-            score = (
-                0.35 * norm_density[i]
-                + 0.20 * norm_filtered[i]
-                + 0.15 * norm_retrieved[i]
-                + 0.15 * norm_diversity[i]
-                + 0.10 * norm_output[i]
-                - 0.05 * norm_latency[i]
-            )
 
-        else:  # balanced
+def _select_best_config(history, objective, chunk_sizes):
 
-            score = (
-                0.35 * norm_filtered[i]
-                + 0.2 * norm_output[i]
-                + 0.15 * norm_retrieved[i]
-                - 0.3 * norm_latency[i]
-            )
+    runs = _scored_runs(history)
 
-        scored.append((run, score))
+    if chunk_sizes:
+        # Only stable regime
+        runs = [r for r in runs if r["config"]["chunk_size"] in chunk_sizes]
 
-    if not scored:
+    if not runs:
         return None
 
-    scored.sort(key=lambda x: x[1], reverse=True)
+    scores = score_runs(runs, objective)
+    best = int(np.argmax(scores))
 
-    best_run, best_score = scored[0]
+    best_run = runs[best]
 
     return {
         "objective": objective,
-        "score": round(best_score, 4),
+        "score": round(scores[best], 4),
         "config": best_run["config"],
         "metrics": best_run["metrics"],
         "debug": best_run["debug"]
     }
+
+
+# ----------------------------
+# Pareto Front
+# ----------------------------
+
+def _front_2d(points):
+    """
+    O(n log n) sweep: sort by x desc (ties y desc); a point survives if
+    it is the best y of its x group and beats every strictly larger x.
+    """
+
+    x, y = points[:, 0], points[:, 1]
+    order = np.lexsort((-y, -x))
+    xs, ys = x[order], y[order]
+
+    group_start = np.zeros(len(xs), dtype=int)
+    new_group = np.r_[True, xs[1:] != xs[:-1]]
+    starts = np.flatnonzero(new_group)
+    group_start[starts] = starts
+    group_start = np.maximum.accumulate(group_start)
+
+    running_max = np.maximum.accumulate(ys)
+    prev_max = np.where(
+        group_start > 0,
+        running_max[np.maximum(group_start - 1, 0)],
+        -np.inf
+    )
+
+    keep = (ys == ys[group_start]) & (ys > prev_max)
+
+    return np.sort(order[keep])
+
+
+def _front_3d(points):
+    """
+    Sweep on x (desc) with a (y, z) staircase of points that have a
+    strictly larger x; ties on x are resolved within their group.
+    """
+
+    order = np.lexsort((-points[:, 2], -points[:, 1], -points[:, 0]))
+    stair_y = []   # ascending
+    stair_z = []   # descending
+    front = []
+
+    i = 0
+    while i < len(order):
+
+        j = i
+        while j < len(order) and points[order[j], 0] == points[order[i], 0]:
+            j += 1
+
+        group = order[i:j]
+        survivors = []
+
+        for idx in group:
+            _, y, z = points[idx]
+
+            # Dominated by a point with larger x?
+            pos = bisect_left(stair_y, y)
+            if pos < len(stair_y) and stair_z[pos] >= z:
+                continue
+
+            survivors.append(idx)
+
+        if survivors:
+            local = _front_2d(points[survivors][:, 1:])
+            survivors = [survivors[k] for k in local]
+
+        for idx in survivors:
+            _, y, z = points[idx]
+            front.append(idx)
+
+            pos = bisect_left(stair_y, y)
+            if pos < len(stair_y) and stair_z[pos] >= z:
+                continue
+
+            # Drop staircase entries now weakly dominated by (y, z)
+            end = bisect_right(stair_y, y)
+            start = end
+            while start > 0 and stair_z[start - 1] <= z:
+                start -= 1
+
+            stair_y[start:end] = [y]
+            stair_z[start:end] = [z]
+
+        i = j
+
+    return np.sort(np.array(front, dtype=int))
+
+
+def _front_blocked(points, block_size=1024):
+    """
+    Blocked dominance check for 4+ objectives.
+
+    A dominator always has a strictly larger coordinate sum, so points
+    are visited in descending-sum blocks and only checked against the
+    front found so far, then against each other within the block.
+    """
+
+    order = np.argsort(-points.sum(axis=1), kind="stable")
+    front = np.empty((0, points.shape[1]))
+    front_idx = []
+
+    for start in range(0, len(order), block_size):
+        idx = order[start:start + block_size]
+        block = points[idx]
+
+        if len(front):
+            ge = (front[None, :, :] >= block[:, None, :]).all(axis=2)
+            gt = (front[None, :, :] > block[:, None, :]).any(axis=2)
+            alive = ~(ge & gt).any(axis=1)
+            idx, block = idx[alive], block[alive]
+
+        ge = (block[None, :, :] >= block[:, None, :]).all(axis=2)
+        gt = (block[None, :, :] > block[:, None, :]).any(axis=2)
+        alive = ~(ge & gt).any(axis=1)
+
+        front = np.vstack([front, block[alive]])
+        front_idx.extend(idx[alive].tolist())
+
+    return np.sort(np.array(front_idx, dtype=int))
+
+
+def pareto_front(points):
+    """
+    Indices of the non-dominated points. Every objective is maximised;
+    negate a column to minimise it.
+    """
+
+    points = np.asarray(points, dtype=float)
+
+    if points.size == 0:
+        return []
+
+    if points.ndim == 1:
+        points = points[:, None]
+
+    m = points.shape[1]
+
+    if m == 1:
+        return np.flatnonzero(points[:, 0] == points[:, 0].max()).tolist()
+
+    if m == 2:
+        return _front_2d(points).tolist()
+
+    if m == 3:
+        return _front_3d(points).tolist()
+
+    return _front_blocked(points).tolist()
+
+
+DEFAULT_PARETO_OBJECTIVES = {
+    "richness": "max",
+    "diversity": "max",
+    "latency": "min",
+    "stability": "max"
+}
+
+
+def select_pareto_configs(history, objectives=None, weights=None):
+    """
+    Non-dominated logged runs for the given objectives
+    ({metric: "max" | "min"}), ranked by a weighted sum of the
+    normalised objectives (equal weights by default).
+
+    Results are cached per history version.
+    """
+
+    objectives = objectives or DEFAULT_PARETO_OBJECTIVES
+    weights = weights or {}
+
+    args = (
+        tuple(objectives.items()),
+        tuple(sorted(weights.items()))
+    )
+
+    return _cached(
+        "pareto",
+        history,
+        args,
+        lambda: _select_pareto_configs(history, objectives, weights)
+    )
+
+
+def _select_pareto_configs(history, objectives, weights):
+
+    runs = _scored_runs(history)
+
+    if not runs:
+        return []
+
+    columns = metric_columns(runs, objectives.keys(), history)
+
+    signed = np.column_stack([
+        columns[name] if direction == "max" else -columns[name]
+        for name, direction in objectives.items()
+    ])
+
+    front = pareto_front(signed)
+
+    score = np.zeros(len(runs))
+    for k, name in enumerate(objectives):
+        score += weights.get(name, 1.0) * normalize_column(signed[:, k])
+
+    front.sort(key=lambda i: score[i], reverse=True)
+
+    return [
+        {
+            "score": round(float(score[i]), 4),
+            "objectives": {name: float(columns[name][i]) for name in objectives},
+            "config": runs[i]["config"],
+            "metrics": runs[i]["metrics"],
+            "debug": runs[i]["debug"]
+        }
+        for i in front
+    ]
@@ -0,0 +1,398 @@
+"""
+Bounded, concurrency-safe on-disk cache.
+
+Every entry is written to a temp file and renamed into place, carries a
+sha256 checksum of its payload, and is dropped (treated as a miss) when
+the checksum does not match. Per-key lock files coalesce concurrent
+computations of the same entry across threads and processes.
+
+    python -m utils.cache_manager stats
+    python -m utils.cache_manager prune --max-mb 500 --ttl-days 30
+"""
+
+import os
+import sys
+import time
+import pickle
+import hashlib
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+CACHE_ROOT = "cache"
+
+MAGIC = b"RLPC1\n"
+LOCK_SUFFIX = ".lock"
+
+# Held locks are touched every LOCK_HEARTBEAT_SECONDS, so a lock not
+# touched for STALE_LOCK_SECONDS belongs to a holder that died
+LOCK_HEARTBEAT_SECONDS = 15
+STALE_LOCK_SECONDS = 120
+
+_file_hashes = {}
+
+
+# ----------------------------
+# Fingerprints
+# ----------------------------
+
+def file_fingerprint(path):
+    """
+    sha256 of a file's contents, memoised per (path, size, mtime).
+    """
+
+    stat = os.stat(path)
+    marker = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+
+    if marker not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _file_hashes[marker] = digest.hexdigest()
+
+    return _file_hashes[marker]
+
+
+# ----------------------------
+# Atomic writes
+# ----------------------------
+
+def atomic_write_bytes(path, data):
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# ----------------------------
+# Cache
+# ----------------------------
+
+class CacheManager:
+    """
+    One cache directory with an eviction policy.
+
+    max_bytes : evict least recently used entries above this size
+    ttl       : evict entries not read or written for this many seconds
+    """
+
+    def __init__(self, directory, max_bytes=None, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def path(self, key, suffix=".pkl"):
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    # ---------------- READ / WRITE ----------------
+
+    def get(self, key, default=None):
+
+        path = self.path(key)
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return default
+
+        payload = self._verify(raw)
+
+        if payload is None:
+            # Corrupt or foreign file: drop it so it gets recomputed
+            self.delete(key)
+            return default
+
+        try:
+            value = pickle.loads(payload)
+        except Exception:
+            self.delete(key)
+            return default
+
+        self.touch(path)
+        return value
+
+    def put(self, key, value):
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest().encode()
+
+        atomic_write_bytes(self.path(key), MAGIC + digest + b"\n" + payload)
+
+        if self.max_bytes is not None or self.ttl is not None:
+            self.evict()
+
+    def contains(self, key):
+        return os.path.exists(self.path(key))
+
+    def delete(self, key, suffix=".pkl"):
+        try:
+            os.remove(self.path(key, suffix))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, path):
+        # mtime doubles as last-access time for LRU / TTL
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _verify(raw):
+
+        if not raw.startswith(MAGIC):
+            return None
+
+        header_end = len(MAGIC) + 64
+        digest = raw[len(MAGIC):header_end]
+        payload = raw[header_end + 1:]
+
+        if hashlib.sha256(payload).hexdigest().encode() != digest:
+            return None
+
+        return payload
+
+    # ---------------- LOCKING ----------------
+
+    @contextmanager
+    def lock(self, key, timeout=None, poll=0.05):
+        """
+        Exclusive per-key lock file (O_EXCL, so it works across threads and
+        processes on every platform). The holder refreshes the lock's mtime
+        from a heartbeat thread however long it computes; a lock whose
+        mtime is older than STALE_LOCK_SECONDS was abandoned and is broken.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key, LOCK_SUFFIX)
+        start = time.time()
+
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+
+                if timeout is not None and time.time() - start > timeout:
+                    raise TimeoutError(f"Cache lock busy: {path}")
+
+                time.sleep(poll)
+
+        released = threading.Event()
+
+        def heartbeat():
+            while not released.wait(LOCK_HEARTBEAT_SECONDS):
+                self.touch(path)
+
+        thread = threading.Thread(target=heartbeat, name="cache-lock-heartbeat", daemon=True)
+        thread.start()
+
+        try:
+            yield
+        finally:
+            released.set()
+            thread.join()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value, computing and storing it on a miss.
+        Concurrent callers for the same key wait for the first one
+        instead of computing it again.
+
+        Returns
+        -------
+        value, hit : (object, bool)
+        """
+
+        _missing = object()
+
+        value = self.get(key, _missing)
+        if value is not _missing:
+            return value, True
+
+        with self.lock(key):
+            value = self.get(key, _missing)
+            if value is not _missing:
+                return value, True
+
+            value = compute()
+            self.put(key, value)
+
+        return value, False
+
+    # ---------------- EVICTION ----------------
+
+    def entries(self):
+        """
+        (paths, size, last access) of every cached entry, oldest first.
+        An entry is a key's .pkl together with its sidecar files (such as
+        <key>.f32.npy vectors), so they are evicted as one.
+        """
+
+        groups = {}
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(LOCK_SUFFIX) or ".tmp" in name:
+                    # Locks and files still being written
+                    continue
+                if name == "manifest.json":
+                    # Corpus index manifests are bookkeeping, not entries
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                key = (root, name.split(".", 1)[0])
+                paths, size, accessed = groups.get(key, ((), 0, 0))
+                groups[key] = (
+                    paths + (path,), size + stat.st_size, max(accessed, stat.st_mtime)
+                )
+
+        return sorted(groups.values(), key=lambda e: e[2])
+
+    def evict(self, max_bytes=None, ttl=None):
+        """
+        Apply TTL, then LRU-by-bytes. Returns the removed paths.
+        """
+
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        ttl = self.ttl if ttl is None else ttl
+
+        entries = self.entries()
+        removed = []
+        now = time.time()
+
+        if ttl is not None:
+            for e in entries:
+                if now - e[2] > ttl:
+                    removed.append(e)
+            entries = [e for e in entries if e not in removed]
+
+        if max_bytes is not None:
+            total = sum(e[1] for e in entries)
+            for e in entries:
+                if total <= max_bytes:
+                    break
+                removed.append(e)
+                total -= e[1]
+
+        removed_paths = [path for paths, _, _ in removed for path in paths]
+
+        for path in removed_paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        return removed_paths
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "bytes": sum(e[1] for e in entries),
+            "oldest": min((e[2] for e in entries), default=None)
+        }
+
+
+# ----------------------------
+# Shared caches
+# ----------------------------
+
+MB = 1024 * 1024
+
+EMBEDDING_CACHE = CacheManager(os.path.join(CACHE_ROOT, "embeddings"), max_bytes=1024 * MB)
+TEXT_CACHE = CacheManager(os.path.join(CACHE_ROOT, "text"), max_bytes=256 * MB)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def _format_bytes(n):
+    return f"{n / MB:.1f} MB"
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m utils.cache_manager")
+    parser.add_argument("--root", default=CACHE_ROOT)
+
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="size and entry count per cache directory")
+
+    prune = sub.add_parser("prune", help="evict by LRU size and/or TTL")
+    prune.add_argument("--namespace", help="only this subdirectory")
+    prune.add_argument("--max-mb", type=float)
+    prune.add_argument("--ttl-days", type=float)
+
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"No cache at {args.root}")
+        return 0
+
+    names = sorted(
+        n for n in os.listdir(args.root)
+        if os.path.isdir(os.path.join(args.root, n))
+    )
+
+    if args.command == "stats":
+        for name in names:
+            s = CacheManager(os.path.join(args.root, name)).stats()
+            print(f"{name:<16}{s['entries']:>8} entries {_format_bytes(s['bytes']):>12}")
+        return 0
+
+    if args.max_mb is None and args.ttl_days is None:
+        parser.error("prune needs --max-mb and/or --ttl-days")
+
+    for name in names:
+        if args.namespace and name != args.namespace:
+            continue
+
+        removed = CacheManager(os.path.join(args.root, name)).evict(
+            max_bytes=args.max_mb * MB if args.max_mb is not None else None,
+            ttl=args.ttl_days * 86400 if args.ttl_days is not None else None
+        )
+        print(f"{name:<16}{len(removed):>8} removed")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,33 @@ from typing import Optional
 class PipelineConfig:
     chunk_size: Optional[int]
     chunk_overlap: int
-    embedding_model: str
+    embedding_model: str  # "local" | "torch-int8" | "onnx" | "onnx-int8"
     retrieval_mode: str
     top_k: int
     temperature: float
     prompt_mode: str
     chunking_mode: str = "fixed"  # "fixed" | "adaptive"
+    vector_storage: str = "float32"  # "float32" | "float16" | "int8"
+    full_precision_rescore: bool = True  # compressed storage: float32 .npy on disk for exact re-scoring
+    context_token_budget: Optional[int] = None  # None = 2,500-char cap
+    generation_backend: str = "auto"  # "auto" | "ollama" | "openai" | "fallback"
+    gap_dedup_threshold: Optional[float] = None  # e.g. 0.9; None = raw keyword hits
+    track_memory: bool = False  # per-stage tracemalloc peak and RSS delta
+    profile: bool = False  # cProfile the run, see utils/profiler.py
+
+
+# App sidebar defaults, for configs given as partial dicts (workloads,
+# service requests)
+DEFAULT_CONFIG = {
+    "chunk_size": 600,
+    "chunk_overlap": 150,
+    "embedding_model": "local",
+    "retrieval_mode": "dense",
+    "top_k": 5,
+    "temperature": 0.2,
+    "prompt_mode": "conservative"
+}
+
+
+def config_from_dict(values):
+    return PipelineConfig(**dict(DEFAULT_CONFIG, **values))
@@ -0,0 +1,159 @@
+import math
+import time
+import random
+
+from pipeline.orchestrator import run_pipeline, complete_generation
+from utils.experiment_logger import log_single_run
+from utils.experiment_sweeper import generate_config_grid
+from utils.best_config_selector import score_runs
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+
+def _as_record(config, results):
+    """
+    Log-style record for score_runs, averaging metrics over repeated
+    generation trials of the same config.
+    """
+
+    metrics = dict(results[-1]["metrics"])
+
+    for key in ("output_length", "generation_time", "total_latency"):
+        metrics[key] = sum(r["metrics"][key] for r in results) / len(results)
+
+    return {
+        "config": vars(config),
+        "metrics": metrics,
+        "debug": results[-1]["debug"]
+    }
+
+
+class _Budget:
+
+    def __init__(self, max_runs, time_budget):
+        self.max_runs = max_runs
+        self.deadline = time.time() + time_budget if time_budget else None
+        self.runs = 0
+
+    def exhausted(self):
+        if self.max_runs is not None and self.runs >= self.max_runs:
+            return True
+        return self.deadline is not None and time.time() >= self.deadline
+
+
+# ----------------------------
+# Successive Halving
+# ----------------------------
+
+def successive_halving_search(
+    base_config,
+    param_grid,
+    document_path,
+    query,
+    objective="balanced",
+    eta=3,
+    max_runs=None,
+    time_budget=None,
+    seed=None,
+    progress_callback=None
+):
+    """
+    Adaptive alternative to evaluating the full generate_config_grid.
+
+    Rung 0 evaluates candidates retrieval-only (no LLM call). The best
+    1/eta are promoted; every later rung adds one generation trial per
+    survivor, reusing its rung-0 retrieval, and keeps the best 1/eta by
+    mean score. Stops at one survivor or when max_runs pipeline runs or
+    time_budget seconds are spent. If the budget cannot cover the whole
+    grid at rung 0, a random sample of it is evaluated.
+
+    Every trial is logged through the experiment logger.
+    progress_callback receives (runs so far, max_runs).
+    """
+
+    configs = generate_config_grid(base_config, param_grid)
+    grid_size = len(configs)
+    budget = _Budget(max_runs, time_budget)
+
+    if max_runs is not None and len(configs) > max_runs // 2:
+        # Keep roughly half of the run budget for generation rungs
+        configs = random.Random(seed).sample(configs, max(1, max_runs // 2))
+
+    rungs = []
+
+    # ---------------- RUNG 0: RETRIEVAL ONLY ----------------
+    candidates = []
+
+    for config in configs:
+        if budget.exhausted():
+            break
+
+        result = run_pipeline(config, document_path, query, retrieval_only=True)
+        log_single_run(config, result)
+        budget.runs += 1
+
+        candidates.append({"config": config, "retrieval": result, "trials": []})
+
+        if progress_callback:
+            progress_callback(budget.runs, max_runs)
+
+    if not candidates:
+        return None
+
+    scores = score_runs(
+        [_as_record(c["config"], [c["retrieval"]]) for c in candidates],
+        objective
+    )
+    rungs.append({"rung": 0, "evaluated": len(candidates), "retrieval_only": True})
+
+    # ---------------- RUNGS 1..: GENERATION ----------------
+    rung = 0
+
+    while (len(candidates) > 1 or not candidates[0]["trials"]) and not budget.exhausted():
+
+        rung += 1
+        keep = max(1, math.ceil(len(candidates) / eta))
+
+        ranked = sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)[:keep]
+        candidates = [c for c, _ in ranked]
+        scores = [score for _, score in ranked]
+
+        evaluated = []
+
+        for c in candidates:
+            if budget.exhausted():
+                break
+
+            result = complete_generation(c["config"], c["retrieval"], query)
+            log_single_run(c["config"], result)
+            budget.runs += 1
+
+            c["trials"].append(result)
+            evaluated.append(c)
+
+            if progress_callback:
+                progress_callback(budget.runs, max_runs)
+
+        if not evaluated:
+            break
+
+        candidates = evaluated
+        scores = score_runs(
+            [_as_record(c["config"], c["trials"]) for c in candidates],
+            objective
+        )
+        rungs.append({"rung": rung, "evaluated": len(evaluated), "retrieval_only": False})
+
+    best_candidate, best_score = max(zip(candidates, scores), key=lambda x: x[1])
+
+    return {
+        "objective": objective,
+        "score": round(best_score, 4),
+        "config": vars(best_candidate["config"]),
+        "generation_trials": len(best_candidate["trials"]),
+        "runs": budget.runs,
+        "grid_size": grid_size,
+        "rungs": rungs
+    }
@@ -1,10 +1,14 @@
 import json
 import os
+import threading
 from datetime import datetime
 from utils.behavior_interpreter import interpret_metrics
+from utils.cache_manager import atomic_write_bytes
 
 LOG_PATH = "data/experiments/experiment_log.json"
 
+_lock = threading.Lock()
+
 
 def _ensure():
     os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
@@ -18,38 +22,92 @@ def _load():
 
 
 def _save(data):
-    json.dump(data, open(LOG_PATH, "w"), indent=2)
+    atomic_write_bytes(LOG_PATH, json.dumps(data, indent=2).encode())
 
 
-def log_single_run(config, result):
+def _append(entry):
+    # Background jobs and the app log concurrently
+    with _lock:
+        logs = _load()
+        logs.append(entry)
+        _save(logs)
+
+
+def _profile_ref(result):
+    # Paths only; the profile itself lives under data/profiles
+    profile = result.get("profile")
+    if not profile:
+        return None
+    return {"pstats": profile["pstats"], "collapsed": profile["collapsed"]}
+
 
-    logs = _load()
+def log_single_run(config, result):
 
-    logs.append({
+    _append({
         "timestamp": datetime.now().isoformat(),
         "mode": "single",
+        "retrieval_only": result["metrics"].get("retrieval_only", False),
         "config": vars(config),
         "metrics": result["metrics"],
         "debug": result.get("debug", {}),
-        "insights": interpret_metrics(result)
+        "insights": interpret_metrics(result),
+        "profile": _profile_ref(result),
+        "retrieved_ids": result.get("retrieved_ids", []),
+        "filtered_ids": result.get("filtered_ids", []),
+        "index_ref": result.get("index_ref")
     })
 
-    _save(logs)
-
 
 def log_comparison_run(config_A, result_A, config_B, result_B, analysis):
 
-    logs = _load()
-
-    logs.append({
+    _append({
         "timestamp": datetime.now().isoformat(),
         "mode": "comparison",
+        "retrieval_only": (
+            result_A["metrics"].get("retrieval_only", False)
+            or result_B["metrics"].get("retrieval_only", False)
+        ),
         "config_A": vars(config_A),
         "config_B": vars(config_B),
-        "analysis": analysis
+        "analysis": analysis,
+        "profile_A": _profile_ref(result_A),
+        "profile_B": _profile_ref(result_B)
     })
 
-    _save(logs)
+
+def log_trial_summary(config, summary):
+    """
+    Record a repeated-trial summary: trial count, per-metric mean /
+    variance / CI and the stability score.
+    """
+
+    _append({
+        "timestamp": datetime.now().isoformat(),
+        "mode": "trials",
+        "config": vars(config),
+        "trials": summary["trials"],
+        "stop_reason": summary["stop_reason"],
+        "target_metric": summary["target_metric"],
+        "stability": summary["stability"],
+        "bootstrap_ci": summary["bootstrap_ci"],
+        "trial_metrics": summary["metrics"],
+        "debug": summary["debug"]
+    })
+
+
+def log_cache_hit(config, result):
+    """
+    Record that a stored result was served instead of re-running, without
+    duplicating the original run entry.
+    """
+
+    _append({
+        "timestamp": datetime.now().isoformat(),
+        "mode": "cache_hit",
+        "config": vars(config),
+        "key": result["cache"]["key"],
+        "stored_at": result["cache"]["stored_at"]
+    })
 
 
 def load_experiment_history():
@@ -1,6 +1,24 @@
+import os
 import itertools
-from pipeline.orchestrator import run_pipeline, compare_runs
-from utils.experiment_logger import log_single_run, log_comparison_run
+from pipeline.orchestrator import compare_runs, complete_generation
+from utils.experiment_logger import log_single_run, log_comparison_run, log_cache_hit
+from utils.result_store import (
+    cached_run_comparison,
+    cached_run_pipeline,
+    result_key,
+    store_result
+)
+from utils.best_config_selector import pareto_front
+from pipeline.evaluation.memory import peak_footprint_mb, available_memory_mb
+
+
+# Objectives that do not depend on the LLM output, used to pick which
+# retrieval-only runs are worth generating for.
+RETRIEVAL_OBJECTIVES = {
+    "filtered_sentence_count": "max",
+    "gap_density": "max",
+    "total_latency": "min"
+}
 
 
 def generate_config_grid(base_config, param_grid):
@@ -22,41 +40,162 @@ def generate_config_grid(base_config, param_grid):
     return configs
 
 
-def run_single_sweep(configs, document_path, query, progress_callback=None):
+def objective_value(result, name):
+
+    if name == "gap_density":
+        retrieved = result["metrics"]["retrieved_count"]
+        return result["debug"]["filtered_sentence_count"] / retrieved if retrieved else 0
+
+    if name in result["metrics"]:
+        return result["metrics"][name]
+
+    return result["debug"].get(name, 0)
+
+
+def pareto_best(results, objectives=RETRIEVAL_OBJECTIVES):
+    """
+    Indices of the results on the Pareto front of the given objectives.
+    """
+
+    points = [
+        tuple(
+            objective_value(r, name) if direction == "max" else -objective_value(r, name)
+            for name, direction in objectives.items()
+        )
+        for r in results
+    ]
+
+    return pareto_front(points)
+
+
+def safe_worker_count(runs, memory_budget_mb=None, max_workers=None, headroom=0.8):
+    """
+    How many configs can run in parallel without running out of memory,
+    judged by the largest per-run footprint among memory-tracked runs
+    (results or log entries with metrics["memory"]).
+
+    memory_budget_mb defaults to the memory currently available; only
+    headroom of it is planned for.
+    """
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    footprints = [
+        peak_footprint_mb(r["metrics"].get("memory"))
+        for r in runs
+        if r.get("metrics", {}).get("memory")
+    ]
+
+    if memory_budget_mb is None:
+        memory_budget_mb = available_memory_mb()
+
+    if not footprints or memory_budget_mb is None or max(footprints) <= 0:
+        return max_workers
+
+    workers = int(memory_budget_mb * headroom // max(footprints))
+
+    return max(1, min(max_workers, workers))
+
+
+def run_single_sweep(
+    configs,
+    document_path,
+    query,
+    progress_callback=None,
+    retrieval_only=False,
+    generate_pareto=False,
+    force=False,
+    profile=False
+):
     """
     Run many configs independently.
+
+    With retrieval_only=True generation is skipped and runs are logged as
+    retrieval-only. generate_pareto then generates (and logs) full runs
+    only for the Pareto-best configs.
+
+    Configs already run on this document and query are served from the
+    result store unless force=True. profile=True runs (and re-runs) every
+    config under cProfile; the log entries reference the saved profiles.
     """
 
     results = []
 
     for i, config in enumerate(configs):
 
-        result = run_pipeline(config, document_path, query)
-        log_single_run(config, result)
+        result = cached_run_pipeline(
+            config, document_path, query,
+            force=force, retrieval_only=retrieval_only, profile=profile or None
+        )
+
+        if result["cache"]["hit"]:
+            log_cache_hit(config, result)
+        else:
+            log_single_run(config, result)
 
         results.append(result)
 
         if progress_callback:
             progress_callback(i + 1, len(configs))
 
+    if retrieval_only and generate_pareto:
+
+        for i in pareto_best(results):
+            results[i] = complete_generation(configs[i], results[i], query)
+            log_single_run(configs[i], results[i])
+
+            store_result(
+                result_key(configs[i], document_path, query),
+                configs[i], document_path, query, results[i]
+            )
+
     return results
 
 
-def run_comparison_sweep(config_pairs, document_path, query, progress_callback=None):
+def run_comparison_sweep(
+    config_pairs,
+    document_path,
+    query,
+    progress_callback=None,
+    retrieval_only=False,
+    force=False,
+    profile=False
+):
     """
     Run many config comparisons.
+
+    Each side is served from the result store when possible; a pair whose
+    runs were both stored is logged as cache hits only. Pairs that run
+    share their common stages and overlap the rest (see run_comparison),
+    except profiled ones, which run one side at a time.
     """
 
     analyses = []
 
     for i, (config_A, config_B) in enumerate(config_pairs):
 
-        result_A = run_pipeline(config_A, document_path, query)
-        result_B = run_pipeline(config_B, document_path, query)
+        if profile or config_A.profile or config_B.profile:
+            result_A, result_B = (
+                cached_run_pipeline(
+                    config, document_path, query,
+                    force=force, retrieval_only=retrieval_only, profile=profile or None
+                )
+                for config in (config_A, config_B)
+            )
+        else:
+            result_A, result_B = cached_run_comparison(
+                config_A, config_B, document_path, query,
+                force=force, retrieval_only=retrieval_only
+            )
 
         analysis = compare_runs(result_A, result_B)
 
-        log_comparison_run(config_A, result_A, config_B, result_B, analysis)
+        if result_A["cache"]["hit"] and result_B["cache"]["hit"]:
+            log_cache_hit(config_A, result_A)
+            log_cache_hit(config_B, result_B)
+        else:
+            log_comparison_run(config_A, result_A, config_B, result_B, analysis)
+
         analyses.append(analysis)
 
         if progress_callback:
@@ -0,0 +1,233 @@
+"""
+Background sweep jobs with a persistent job table.
+
+Each job is one JSON file under JOB_DIR, so the table survives page
+reloads and restarts of the app. Jobs run on a small worker pool inside
+the app's server process; the page polls the table for progress.
+Cancellation is cooperative: the sweep stops after the config in
+progress finishes.
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache_manager import atomic_write_bytes
+from utils.config_schema import PipelineConfig
+from utils.experiment_sweeper import run_single_sweep, run_comparison_sweep
+
+
+JOB_DIR = "data/jobs"
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# ----------------------------
+# Job table
+# ----------------------------
+
+def _job_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.json")
+
+
+def load_job(job_id):
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _json_default(value):
+    # NumPy scalars in metrics
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def save_job(job):
+    data = json.dumps(job, indent=2, default=_json_default)
+    atomic_write_bytes(_job_path(job["id"]), data.encode())
+
+
+def list_jobs(limit=None):
+    """
+    Jobs, newest first.
+    """
+
+    if not os.path.isdir(JOB_DIR):
+        return []
+
+    jobs = [
+        load_job(name[:-len(".json")])
+        for name in os.listdir(JOB_DIR)
+        if name.endswith(".json")
+    ]
+    jobs = sorted((j for j in jobs if j), key=lambda j: j["created"], reverse=True)
+
+    return jobs[:limit] if limit else jobs
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+
+class JobManager:
+    """
+    Submits sweeps to a worker pool and records their state in the job
+    table. max_workers=1 runs jobs one after another.
+    """
+
+    def __init__(self, max_workers=1):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self.recover()
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = load_job(job_id)
+            job.update(changes)
+            save_job(job)
+            return job
+
+    def recover(self):
+        """
+        Re-queue jobs that were queued or running when the process
+        stopped. Configs that had finished are served from the result
+        store, so a resumed sweep only runs what is left.
+        """
+
+        for job in list_jobs():
+            if job["status"] in ACTIVE_STATES and not job["cancel_requested"]:
+                self._update(job["id"], status="queued", resumed=job.get("resumed", 0) + 1)
+                self._pool.submit(self._run, job["id"])
+            elif job["status"] in ACTIVE_STATES:
+                self._update(job["id"], status="cancelled", finished=datetime.now().isoformat())
+
+    def submit(self, kind, document_path, query, configs, **options):
+        """
+        kind : "single" (configs is a list of PipelineConfig) or
+               "comparison" (configs is a list of (config_A, config_B))
+        options are passed to the sweep (retrieval_only, force, ...).
+        """
+
+        if kind == "single":
+            serialized = [vars(c) for c in configs]
+        elif kind == "comparison":
+            serialized = [[vars(a), vars(b)] for a, b in configs]
+        else:
+            raise ValueError(f"Invalid job kind: {kind}")
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "status": "queued",
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+            "document": document_path,
+            "query": query,
+            "configs": serialized,
+            "options": options,
+            "progress": {"done": 0, "total": len(serialized)},
+            "cancel_requested": False,
+            "error": None,
+            "results": None
+        }
+
+        with self._lock:
+            save_job(job)
+
+        self._pool.submit(self._run, job["id"])
+
+        return job["id"]
+
+    def cancel(self, job_id):
+
+        with self._lock:
+            job = load_job(job_id)
+            job["cancel_requested"] = True
+
+            # Not started yet: the worker will skip it
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+                job["finished"] = datetime.now().isoformat()
+
+            save_job(job)
+
+    def _run(self, job_id):
+
+        with self._lock:
+            job = load_job(job_id)
+            if job is None or job["status"] != "queued" or job["cancel_requested"]:
+                return
+            job["status"] = "running"
+            job["started"] = datetime.now().isoformat()
+            save_job(job)
+
+        def progress(done, total):
+            current = self._update(job_id, progress={"done": done, "total": total})
+            if current["cancel_requested"] and done < total:
+                raise JobCancelled()
+
+        try:
+            if job["kind"] == "single":
+                results = run_single_sweep(
+                    [PipelineConfig(**c) for c in job["configs"]],
+                    job["document"],
+                    job["query"],
+                    progress_callback=progress,
+                    **job["options"]
+                )
+                summary = [
+                    {"metrics": r["metrics"], "debug": r["debug"], "cache_hit": r["cache"]["hit"]}
+                    for r in results
+                ]
+            else:
+                summary = run_comparison_sweep(
+                    [(PipelineConfig(**a), PipelineConfig(**b)) for a, b in job["configs"]],
+                    job["document"],
+                    job["query"],
+                    progress_callback=progress,
+                    **job["options"]
+                )
+
+            self._update(
+                job_id, status="completed", results=summary,
+                finished=datetime.now().isoformat()
+            )
+
+        except JobCancelled:
+            self._update(job_id, status="cancelled", finished=datetime.now().isoformat())
+
+        except Exception as e:
+            self._update(
+                job_id, status="failed", error=f"{type(e).__name__}: {e}",
+                finished=datetime.now().isoformat()
+            )
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager(max_workers=1):
+    """
+    The process-wide JobManager (Streamlit re-runs the script on every
+    interaction, so it must not be created per run).
+    """
+
+    global _manager
+
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(max_workers)
+
+    return _manager
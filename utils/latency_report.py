@@ -0,0 +1,164 @@
+import json
+
+from pipeline.evaluation.latency import LatencyHistogram, LATENCY_STAGES, stage_latency
+
+
+# Default service-level objective: 95% of full runs within 30 s
+DEFAULT_SLO = {"total_latency": {"p95": 30.0}}
+
+REPORTED_PERCENTILES = (50, 95, 99)
+
+# Instrumentation flags do not define a configuration
+_IGNORED_FIELDS = ("profile", "track_memory")
+
+
+# ----------------------------
+# Slicing
+# ----------------------------
+
+def _matches(entry, where):
+
+    if where is None:
+        return True
+
+    if callable(where):
+        return where(entry)
+
+    config = entry["config"]
+
+    for field, expected in where.items():
+        value = entry.get(field) if field == "retrieval_only" else config.get(field)
+        allowed = expected if isinstance(expected, (list, tuple, set)) else [expected]
+        if value not in allowed:
+            return False
+
+    return True
+
+
+def _config_id(entry):
+    config = {k: v for k, v in entry["config"].items() if k not in _IGNORED_FIELDS}
+    return json.dumps(
+        {"config": config, "retrieval_only": entry.get("retrieval_only", False)},
+        sort_keys=True
+    )
+
+
+# ----------------------------
+# Aggregation
+# ----------------------------
+
+def latency_histograms(history, where=None):
+    """
+    Per-config, per-stage histograms over the single runs in history.
+
+    where filters the slice: a callable on log entries, or a dict of
+    config field -> value (or list of values); "retrieval_only" filters
+    on the entry flag. Retrieval-only runs are kept apart from full runs
+    of the same config.
+
+    Returns
+    -------
+    dict : config id -> {"config", "retrieval_only", "stages": {stage: LatencyHistogram}}
+    """
+
+    groups = {}
+
+    for entry in history:
+
+        if entry.get("mode") != "single" or not _matches(entry, where):
+            continue
+
+        cid = _config_id(entry)
+
+        if cid not in groups:
+            groups[cid] = {
+                "config": entry["config"],
+                "retrieval_only": entry.get("retrieval_only", False),
+                "stages": {s: LatencyHistogram() for s in LATENCY_STAGES}
+            }
+
+        for stage, hist in groups[cid]["stages"].items():
+            hist.record(stage_latency(entry["metrics"], stage))
+
+    return groups
+
+
+def merge_histograms(groups):
+    """
+    One histogram per stage across all configs of a slice.
+    """
+
+    merged = {s: LatencyHistogram() for s in LATENCY_STAGES}
+
+    for group in groups.values():
+        for stage, hist in group["stages"].items():
+            merged[stage].merge(hist)
+
+    return merged
+
+
+def summarize(hist):
+
+    summary = {f"p{q}": round(hist.percentile(q), 4) for q in REPORTED_PERCENTILES}
+    summary["mean"] = round(hist.mean, 4)
+    summary["runs"] = hist.count
+    # Sequential runs per second
+    summary["throughput"] = round(hist.count / hist.total, 4) if hist.total else 0.0
+
+    return summary
+
+
+def slo_violations(stages, slo):
+    """
+    Broken objectives, e.g. {"total_latency": {"p95": 30}} ->
+    [{"stage", "percentile", "limit", "observed"}].
+    """
+
+    violations = []
+
+    for stage, limits in slo.items():
+        for percentile, limit in limits.items():
+            observed = stages[stage].percentile(float(percentile.lstrip("p")))
+            if observed > limit:
+                violations.append({
+                    "stage": stage,
+                    "percentile": percentile,
+                    "limit": limit,
+                    "observed": round(observed, 4)
+                })
+
+    return violations
+
+
+def latency_report(history, where=None, slo=None):
+    """
+    Tail-latency report over a slice of the experiment history.
+
+    Returns
+    -------
+    dict with
+        overall : {stage: p50/p95/p99, mean, runs, throughput}
+        configs : one row per config, slowest p95 total latency first,
+                  with per-stage summaries and its SLO violations
+    """
+
+    slo = DEFAULT_SLO if slo is None else slo
+    groups = latency_histograms(history, where)
+
+    configs = []
+
+    for group in groups.values():
+        configs.append({
+            "config": group["config"],
+            "retrieval_only": group["retrieval_only"],
+            "stages": {s: summarize(h) for s, h in group["stages"].items()},
+            "slo_violations": slo_violations(group["stages"], slo)
+        })
+
+    configs.sort(key=lambda r: r["stages"]["total_latency"]["p95"], reverse=True)
+
+    return {
+        "overall": {s: summarize(h) for s, h in merge_histograms(groups).items()},
+        "configs": configs,
+        "slo": slo
+    }
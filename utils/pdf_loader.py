@@ -1,8 +1,16 @@
 from pypdf import PdfReader
 
-def load_pdf(path: str) -> str:
+def iter_pdf_pages(path: str):
+    """
+    Yield the text of each page in turn, so a large PDF never has to be
+    held as one string.
+    """
     reader = PdfReader(path)
-    text = ""
     for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+        yield page.extract_text() + "\n"
+
+def count_pdf_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+def load_pdf(path: str) -> str:
+    return "".join(iter_pdf_pages(path))
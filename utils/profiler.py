@@ -0,0 +1,124 @@
+import os
+import pstats
+import cProfile
+from datetime import datetime
+
+
+PROFILE_DIR = "data/profiles"
+
+
+# ----------------------------
+# Profiling
+# ----------------------------
+
+def profile_call(fn, *args, **kwargs):
+    """
+    Run fn under cProfile and save the artifacts.
+
+    Returns
+    -------
+    value : whatever fn returns
+    profile : dict
+        Paths of the .pstats file and the collapsed-stack file (one
+        "frame;frame;frame microseconds" line per stack, the input
+        format of flamegraph.pl / speedscope), plus the top functions.
+    """
+
+    profiler = cProfile.Profile()
+    value = profiler.runcall(fn, *args, **kwargs)
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+    pstats_path = os.path.join(PROFILE_DIR, f"{run_id}.pstats")
+    collapsed_path = os.path.join(PROFILE_DIR, f"{run_id}.collapsed")
+
+    profiler.dump_stats(pstats_path)
+    stats = pstats.Stats(profiler)
+
+    with open(collapsed_path, "w") as f:
+        for stack, micros in collapsed_stacks(stats):
+            f.write(f"{stack} {micros}\n")
+
+    return value, {
+        "pstats": pstats_path,
+        "collapsed": collapsed_path,
+        "top": top_functions(stats, limit=10)
+    }
+
+
+# ----------------------------
+# Reporting
+# ----------------------------
+
+def _label(func):
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def top_functions(stats, limit=20):
+    """
+    Functions by cumulative time. stats is a pstats.Stats or a path.
+    """
+
+    if isinstance(stats, str):
+        stats = pstats.Stats(stats)
+
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+
+    return [
+        {
+            "function": _label(func),
+            "calls": nc,
+            "tottime": round(tt, 4),
+            "cumtime": round(ct, 4)
+        }
+        for func, (cc, nc, tt, ct, callers) in rows[:limit]
+    ]
+
+
+def collapsed_stacks(stats, max_depth=64):
+    """
+    Approximate call stacks from cProfile's caller/callee edges.
+
+    cProfile keeps only one level of callers, so each function's
+    cumulative time is split across its callees in proportion to the
+    per-edge cumulative times.
+    """
+
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [f for f, row in stats.stats.items() if not row[4]]
+    totals = {}
+
+    def walk(func, share, path):
+        cc, nc, tt, ct, _ = stats.stats[func]
+        path = path + [_label(func)]
+
+        if ct <= 0:
+            return
+
+        self_time = share * min(1.0, tt / ct)
+        if self_time > 0:
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0) + self_time
+
+        if len(path) >= max_depth:
+            return
+
+        for callee, edge_ct in callees.get(func, []):
+            if _label(callee) in path:
+                continue  # recursion
+            walk(callee, share * edge_ct / ct, path)
+
+    for root in roots:
+        walk(root, stats.stats[root][3], [])
+
+    return [
+        (stack, int(seconds * 1e6))
+        for stack, seconds in sorted(totals.items())
+        if seconds * 1e6 >= 1
+    ]
@@ -1,6 +1,3 @@
-import plotly.graph_objects as go
-
-
 def plot_comparison_radar(best_run, second_run, history):
 
     categories = [
@@ -40,6 +37,9 @@ def plot_comparison_radar(best_run, second_run, history):
             norm_best.append((b - min_v) / (max_v - min_v))
             norm_second.append((s - min_v) / (max_v - min_v))
 
+    # plotly is imported on first plot, not at app startup
+    import plotly.graph_objects as go
+
     fig = go.Figure()
 
     # BEST CONFIG (strong, solid)
@@ -0,0 +1,197 @@
+import json
+import hashlib
+from datetime import datetime
+from contextlib import ExitStack
+
+from pipeline.orchestrator import run_comparison, run_pipeline
+from pipeline.evaluation.records import compact_result
+from pipeline.generation.backends import GENERATION_MODEL
+from utils.cache_manager import CacheManager, file_fingerprint
+
+
+RESULT_DIR = "data/results"
+
+# Bump when a code change alters results for the same inputs
+PIPELINE_VERSION = "1"
+
+# Memoised results are the experiment record: no size or age limit
+RESULT_CACHE = CacheManager(RESULT_DIR)
+
+# Config fields that only add instrumentation: not part of the key, and
+# a run that asks for them always executes
+INSTRUMENTATION_FIELDS = ("profile", "track_memory")
+
+
+# ----------------------------
+# Keys
+# ----------------------------
+
+def document_fingerprint(document_path):
+    return file_fingerprint(document_path)
+
+
+def normalize_config(config):
+    return {
+        k: round(v, 6) if isinstance(v, float) else v
+        for k, v in sorted(vars(config).items())
+        if k not in INSTRUMENTATION_FIELDS
+    }
+
+
+def normalize_query(query):
+    return " ".join(query.split())
+
+
+def result_key(config, document_path, query, retrieval_only=False):
+
+    payload = json.dumps({
+        "document": document_fingerprint(document_path),
+        "config": normalize_config(config),
+        "query": normalize_query(query),
+        "retrieval_only": retrieval_only,
+        "pipeline_version": PIPELINE_VERSION,
+        "generation_model": GENERATION_MODEL
+    }, sort_keys=True)
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ----------------------------
+# Store
+# ----------------------------
+
+def load_result(key):
+    return RESULT_CACHE.get(key)
+
+
+def store_result(key, config, document_path, query, result):
+
+    entry = {
+        "key": key,
+        "stored_at": datetime.now().isoformat(),
+        "document": document_fingerprint(document_path),
+        "config": normalize_config(config),
+        "query": normalize_query(query),
+        # Chunk and sentence text is rebuilt from the index on demand
+        "result": compact_result(result)
+    }
+
+    RESULT_CACHE.put(key, entry)
+
+    return entry
+
+
+def cached_run_pipeline(
+    config,
+    document_path,
+    query,
+    force=False,
+    retrieval_only=False,
+    profile=None,
+    progress_callback=None
+):
+    """
+    run_pipeline, memoised across sessions on (document content hash,
+    normalised config, query, pipeline/model version).
+
+    force=True always re-runs (e.g. for repeated trials) and overwrites
+    the stored entry. result["cache"] tells whether it was a hit. Stored
+    results are compact: use hydrate_result for retrieved_chunks and
+    filtered_context.
+    Profiled or memory-tracked runs always re-run, since a stored result
+    says nothing about where this run spends its time or memory.
+    """
+
+    if profile is None:
+        profile = config.profile
+
+    force = force or profile or config.track_memory
+
+    key = result_key(config, document_path, query, retrieval_only)
+
+    if not force:
+        entry = load_result(key)
+        if entry is not None:
+            result = entry["result"]
+            result["cache"] = {"hit": True, "key": key, "stored_at": entry["stored_at"]}
+            return result
+
+    # Concurrent sessions asking for the same triple share one run
+    with RESULT_CACHE.lock(key):
+
+        entry = None if force else load_result(key)
+
+        if entry is not None:
+            result = entry["result"]
+            result["cache"] = {"hit": True, "key": key, "stored_at": entry["stored_at"]}
+            return result
+
+        result = run_pipeline(
+            config, document_path, query, retrieval_only=retrieval_only, profile=profile,
+            progress_callback=progress_callback
+        )
+        entry = store_result(key, config, document_path, query, result)
+
+    result["cache"] = {"hit": False, "key": key, "stored_at": entry["stored_at"]}
+    return result
+
+
+def cached_run_comparison(
+    config_A,
+    config_B,
+    document_path,
+    query,
+    force=False,
+    retrieval_only=False
+):
+    """
+    cached_run_pipeline for both sides of an A/B comparison. When neither
+    side is stored, both run through run_comparison, which computes their
+    shared stages once and overlaps the rest.
+
+    Returns (result_A, result_B); analyse them with compare_runs.
+    """
+
+    configs = (config_A, config_B)
+    keys = [result_key(c, document_path, query, retrieval_only) for c in configs]
+
+    def stored():
+        return any(
+            load_result(k) is not None
+            for c, k in zip(configs, keys)
+            if not (force or c.track_memory)
+        )
+
+    def run_each():
+        # Stored sides are hits; only the others run
+        return tuple(
+            cached_run_pipeline(c, document_path, query, force=force, retrieval_only=retrieval_only)
+            for c in configs
+        )
+
+    if stored():
+        return run_each()
+
+    with ExitStack() as stack:
+
+        # Sorted, so two sessions comparing the same pair cannot deadlock
+        for key in sorted(set(keys)):
+            stack.enter_context(RESULT_CACHE.lock(key))
+
+        if not stored():
+
+            result_A, result_B, _ = run_comparison(
+                config_A, config_B, document_path, query, retrieval_only=retrieval_only
+            )
+
+            results = []
+            for config, key, result in zip(configs, keys, (result_A, result_B)):
+                entry = store_result(key, config, document_path, query, result)
+                result = dict(result)
+                result["cache"] = {"hit": False, "key": key, "stored_at": entry["stored_at"]}
+                results.append(result)
+
+            return tuple(results)
+
+    # Another session stored a side while we waited for the locks
+    return run_each()
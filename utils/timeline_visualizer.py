@@ -1,9 +1,9 @@
-import plotly.graph_objects as go
-
-
 def plot_experiment_timeline(history):
 
-    runs = [r for r in history if r["mode"] == "single"]
+    runs = [
+        r for r in history
+        if r["mode"] == "single" and not r.get("retrieval_only")
+    ]
 
     if len(runs) < 2:
         return None
@@ -15,6 +15,9 @@ def plot_experiment_timeline(history):
     output_len = [r["metrics"]["output_length"] for r in runs]
     configs = [r["config"] for r in runs]
 
+    # plotly is only imported once there is something to draw
+    import plotly.graph_objects as go
+
     fig = go.Figure()
 
     # ---------------- MAIN LINES ----------------
@@ -86,7 +89,10 @@ def plot_experiment_timeline(history):
 
 def generate_timeline_insights(history):
 
-    runs = [r for r in history if r["mode"] == "single"]
+    runs = [
+        r for r in history
+        if r["mode"] == "single" and not r.get("retrieval_only")
+    ]
 
     if len(runs) < 3:
         return ["Not enough experiments to infer behavioral patterns"]
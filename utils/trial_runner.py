@@ -0,0 +1,111 @@
+from pipeline.orchestrator import run_pipeline, complete_generation
+from pipeline.evaluation.confidence import RunningStats, bootstrap_ci
+from utils.experiment_logger import log_trial_summary
+
+
+# Metrics that vary between trials of one config (retrieval is fixed)
+TRIAL_METRICS = ("output_length", "generation_time", "total_latency")
+
+
+def run_repeated_trials(
+    config,
+    document_path,
+    query,
+    min_trials=3,
+    max_trials=10,
+    target_metric="output_length",
+    direction="max",
+    rel_ci_width=0.1,
+    dominated_by=None
+):
+    """
+    Repeat only the nondeterministic stage (generation) of one config.
+
+    Indexing and retrieval run once; each trial re-generates from the same
+    context. Per-metric Welford statistics are updated online and trials
+    stop early once the target metric's 95% CI half-width is within
+    rel_ci_width of its mean, or once the CI lies entirely below (for
+    direction="max") the dominated_by bound from a better config.
+
+    Returns a summary with trial count, per-metric stats, stability and a
+    bootstrap CI of the target metric.
+    """
+
+    base = run_pipeline(config, document_path, query, retrieval_only=True)
+
+    stats = {m: RunningStats() for m in TRIAL_METRICS}
+    values = []
+    stop_reason = "max_trials"
+
+    for trial in range(max_trials):
+
+        result = complete_generation(config, base, query)
+
+        for m in TRIAL_METRICS:
+            stats[m].update(result["metrics"][m])
+        values.append(result["metrics"][target_metric])
+
+        if trial + 1 < min_trials:
+            continue
+
+        target = stats[target_metric]
+        low, high = target.confidence_interval()
+
+        if target.ci_half_width() <= rel_ci_width * abs(target.mean):
+            stop_reason = "converged"
+            break
+
+        if dominated_by is not None and (
+            high < dominated_by if direction == "max" else low > dominated_by
+        ):
+            stop_reason = "dominated"
+            break
+
+    return {
+        "trials": stats[target_metric].n,
+        "stop_reason": stop_reason,
+        "target_metric": target_metric,
+        "stability": round(stats[target_metric].stability(), 4),
+        "bootstrap_ci": bootstrap_ci(values),
+        "metrics": {m: s.to_dict() for m, s in stats.items()},
+        "debug": base["debug"]
+    }
+
+
+def run_trial_sweep(
+    configs,
+    document_path,
+    query,
+    progress_callback=None,
+    **trial_kwargs
+):
+    """
+    Repeated trials over many configs, logging one summary per config.
+
+    A config stops early once it is clearly worse than the best config
+    seen so far (its CI cannot reach that config's lower CI bound).
+    """
+
+    direction = trial_kwargs.get("direction", "max")
+    bound = None
+    summaries = []
+
+    for i, config in enumerate(configs):
+
+        summary = run_repeated_trials(
+            config, document_path, query, dominated_by=bound, **trial_kwargs
+        )
+        log_trial_summary(config, summary)
+        summaries.append(summary)
+
+        target = summary["metrics"][summary["target_metric"]]
+        # Compare against the best config's conservative CI bound
+        candidate = target["ci_low"] if direction == "max" else target["ci_high"]
+
+        if bound is None or (candidate > bound if direction == "max" else candidate < bound):
+            bound = candidate
+
+        if progress_callback:
+            progress_callback(i + 1, len(configs))
+
+    return summaries
@@ -0,0 +1,80 @@
+import os
+import json
+import hashlib
+import threading
+
+from utils.cache_manager import atomic_write_bytes
+
+
+UPLOAD_DIR = "data/uploads"
+NAMES_FILE = "names.json"
+
+_lock = threading.Lock()
+
+
+# ----------------------------
+# Content-addressed uploads
+# ----------------------------
+
+def upload_path(digest, extension=".pdf"):
+    return os.path.join(UPLOAD_DIR, f"{digest}{extension}")
+
+
+def store_upload(data, filename=None):
+    """
+    Save uploaded bytes under their sha256, once. Uploading the same file
+    again (any name, any session) returns the existing path, so its
+    mtime and every cache keyed on it stay valid.
+    """
+
+    digest = hashlib.sha256(data).hexdigest()
+    extension = os.path.splitext(filename or "")[1].lower() or ".pdf"
+    path = upload_path(digest, extension)
+
+    if not os.path.exists(path):
+        atomic_write_bytes(path, data)
+
+    if filename:
+        _remember_name(digest, filename)
+
+    return path
+
+
+# ----------------------------
+# Original file names
+# ----------------------------
+
+def _names_path():
+    return os.path.join(UPLOAD_DIR, NAMES_FILE)
+
+
+def _load_names():
+    try:
+        with open(_names_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _remember_name(digest, filename):
+
+    with _lock:
+        names = _load_names()
+        known = names.setdefault(digest, [])
+
+        if filename in known:
+            return
+
+        known.append(filename)
+        atomic_write_bytes(_names_path(), json.dumps(names, indent=2).encode())
+
+
+def display_name(path):
+    """
+    First name a stored upload was uploaded under, else its file name.
+    """
+
+    digest = os.path.splitext(os.path.basename(path))[0]
+    names = _load_names().get(digest)
+
+    return names[0] if names else os.path.basename(path)